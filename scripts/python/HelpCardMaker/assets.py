@@ -0,0 +1,229 @@
+""" Helpers to write help card sections to an asset definition, a section is
+    only written when its content actually changed.
+"""
+import os
+import time
+import hashlib
+from collections import OrderedDict
+
+def content_hash(data):
+    """ sha1 hex digest of a section content, str or bytes.
+    """
+    if not isinstance(data, bytes):
+        data = data.encode("utf-8")
+    return hashlib.sha1(data).hexdigest()
+
+def content_section_name(data, file_name=""):
+    """ Content addressed section name suffix: the hash of the data and the
+        extension of the original file ( png by default ).
+    """
+    ext = os.path.splitext(file_name)[1].lower() or ".png"
+    return content_hash(data) + ext
+
+class SectionWriter(object):
+    """ Compare the content hash of each section to write against the one
+        stored in the definition and only write the ones which differ.
+        The definition is saved only when something has been written.
+        Sections can be staged then written in one commit(), the previous
+        contents are kept so a failed commit is rolled back.
+    """
+    def __init__(self, definition):
+
+        self.definition = definition
+        self.sections = definition.sections()
+        self.written = []
+        self.removed = []
+        self.staged = OrderedDict()
+        self.timings = OrderedDict()
+        # (section name, previous contents or None if it did not exist)
+        self._undo = []
+
+    @property
+    def changed(self):
+
+        return bool(self.written or self.removed)
+
+    def is_unchanged(self, name, data):
+
+        section = self.sections.get(name)
+        if section is None:
+            return False
+        return content_hash(section.contents()) == content_hash(data)
+
+    def write(self, name, data):
+        """ Write the section if its content differs, return True if
+            it has been written.
+        """
+        if self.is_unchanged(name, data):
+            return False
+
+        section = self.sections.get(name)
+        if section is None:
+            self._undo.append((name, None))
+            self.sections[name] = self.definition.addSection(name, data)
+        else:
+            self._undo.append((name, section.contents()))
+            section.setContents(data)
+
+        self.written.append(name)
+        return True
+
+    def stage(self, name, data):
+        """ Queue a section to be written by commit().
+        """
+        self.staged[name] = data
+
+    def remove(self, name):
+
+        section = self.sections.pop(name, None)
+        if section is None:
+            return False
+
+        self._undo.append((name, section.contents()))
+        section.destroy()
+        self.removed.append(name)
+        return True
+
+    def collect_garbage(self, referenced, prefixes):
+        """ Remove the sections starting with one of the given prefixes
+            which are not in the referenced names, return the removed names.
+        """
+        unused = [k for k in self.sections.keys() \
+                  if k.startswith(tuple(prefixes)) and k not in referenced]
+        for k in unused:
+            self.remove(k)
+        return unused
+
+    def save(self):
+        """ Save the definition to its library file if any section changed,
+            return True if saved.
+        """
+        if not self.changed:
+            return False
+
+        self.definition.save(self.definition.libraryFilePath())
+        return True
+
+    def commit(self, referenced=None, prefixes=()):
+        """ Write the staged sections, remove the sections with one of the
+            given prefixes not in referenced ( if given ) and save.
+            Everything is rolled back if a step fails. Return True if the
+            definition has been saved, the time of each step is stored in
+            timings.
+        """
+        try:
+            start = time.time()
+            for name, data in self.staged.items():
+                self.write(name, data)
+            self.staged.clear()
+            self.timings["write"] = time.time() - start
+
+            start = time.time()
+            if referenced is not None:
+                self.collect_garbage(referenced, prefixes)
+            self.timings["clean"] = time.time() - start
+
+            start = time.time()
+            saved = self.save()
+            self.timings["save"] = time.time() - start
+        except Exception:
+            self.rollback()
+            raise
+
+        self._undo = []
+        return saved
+
+    def rollback(self):
+        """ Restore the sections written or removed since the last commit.
+        """
+        for name, contents in reversed(self._undo):
+            section = self.sections.get(name)
+            if contents is None:
+                if section is not None:
+                    section.destroy()
+                    del self.sections[name]
+            elif section is None:
+                self.sections[name] = self.definition.addSection(name, contents)
+            else:
+                section.setContents(contents)
+
+        self._undo = []
+        self.written = []
+        self.removed = []
+        self.staged.clear()
+
+class ImageStore(object):
+    """ Encoded image data shared by the image blocks, keyed by section
+        name. The images read from an asset are only referenced by their
+        hou.HDASection and fetched on demand, the data of the new images is
+        kept once whatever the number of blocks showing it.
+        The sections are bound again to the written ones with rebind()
+        after a commit, the section an image was read from can have been
+        removed by it ( older cards image names ).
+    """
+    def __init__(self):
+
+        self._data = {}
+        self._sections = {}
+        # name of the section each entry was read from
+        self._sources = {}
+        self._refs = {}
+
+    def add(self, name, data=None, section=None):
+
+        if section is not None:
+            if name not in self._sections:
+                self._sections[name] = section
+                self._sources[name] = section.name()
+                self._data.pop(name, None)
+        elif name not in self._sections:
+            self._data.setdefault(name, data)
+        self._refs[name] = self._refs.get(name, 0) + 1
+
+    def discard(self, name):
+
+        n = self._refs.get(name, 0) - 1
+        if n > 0:
+            self._refs[name] = n
+            return
+        self._refs.pop(name, None)
+        self._data.pop(name, None)
+        self._sections.pop(name, None)
+        self._sources.pop(name, None)
+
+    def data(self, name):
+        """ Image data, None if the section it was read from has been
+            deleted and not bound again.
+        """
+        section = self._sections.get(name)
+        if section is None:
+            return self._data.get(name)
+
+        import hou
+        try:
+            return section.contents()
+        except hou.ObjectWasDeleted:
+            print("Image error: section of {} has been deleted".format(name))
+            return None
+
+    def rebind(self, sections):
+        """ Reference the given sections ( dict name => hou.HDASection ) for
+            the entries stored under their name or read from a section of
+            the same name, the data of the new images is then dropped.
+        """
+        for name in list(self._refs):
+            section = sections.get(name)
+            if section is None:
+                section = sections.get(self._sources.get(name))
+            if section is None:
+                continue
+            self._sections[name] = section
+            self._sources[name] = section.name()
+            self._data.pop(name, None)
+
+    def memory(self):
+        """ Bytes held in memory, the section references are not counted.
+        """
+        return sum([len(d) for d in self._data.values() if d])
+
+store = ImageStore()
@@ -0,0 +1,189 @@
+""" Regenerate the help cards of a whole HDA library from the command line.
+
+    hython -m HelpCardMaker.batch [options] file.hda [dir ...]
+
+    Every library file is processed by its own worker process. Only the
+    cards created by help card maker are touched, they are parsed with the
+    document model and written back with the current version, the
+    asset parameters can be merged into the parameters grid with --parms
+    ( edited help is kept ). hou is only imported inside the workers, a
+    stub hou module found first on the python path can be used for testing.
+"""
+import os
+import sys
+import time
+import argparse
+import traceback
+import multiprocessing
+
+import HelpCardMaker
+VERSION = HelpCardMaker.__version__
+
+from HelpCardMaker import model
+from HelpCardMaker import assets
+from HelpCardMaker import parms
+
+LIBRARY_EXTENSIONS = (".hda", ".otl", ".hdanc", ".otlnc", ".hdalc", ".otllc")
+
+def find_libraries(paths):
+    """ Expand the given files and directories to a sorted list of
+        library files.
+    """
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, dirs, names in os.walk(p):
+                files += [os.path.join(root, n) for n in names \
+                          if n.lower().endswith(LIBRARY_EXTENSIONS)]
+        else:
+            files.append(p)
+
+    return sorted(set(files))
+
+def refresh_card(help_str, definition=None, refresh_parms=False, prune=False):
+    """ Parse and re-serialize a help card string, merge the parameters of
+        the given definition into the grid if refresh_parms is True ( the
+        edited help is kept, removed parameters are dropped if prune ).
+        Return the new help card string, the list of (line, error) of
+        the clusters which could not be read and the parms.SyncReport list.
+    """
+    card = model.HelpCard.parse(help_str)
+
+    reports = []
+    if refresh_parms and definition is not None:
+        fresh = parms.scan_definition(definition)
+        for b in card:
+            if isinstance(b, model.ParametersData):
+                b.folders, _, report = parms.merge_parms(b.folders, fresh,
+                                                         keep_removed=not prune)
+                reports.append(report)
+
+    return card.serialize(VERSION), card.errors, reports
+
+def process_library(path, refresh_parms=False, dry_run=False, prune=False):
+    """ Refresh every help card of a library file, return a dict of
+        statistics about the file. Executed in a worker process.
+    """
+    import hou
+
+    result = {"path": path, "definitions": 0, "updated": 0, "skipped": 0,
+              "errors": [], "parms": [], "time": 0.0}
+    start = time.time()
+
+    try:
+        for definition in hou.hda.definitionsInFile(path):
+
+            result["definitions"] += 1
+            name = definition.nodeTypeName()
+
+            help = definition.sections().get("Help")
+            help_str = help.contents() if help else ""
+            if not help_str.startswith(model.HEADER):
+                result["skipped"] += 1
+                continue
+
+            try:
+                new_help, errors, reports = refresh_card(help_str, definition,
+                                                         refresh_parms, prune)
+            except model.HelpCardError as e:
+                result["errors"].append("{}: {}".format(name, e))
+                continue
+
+            result["errors"] += ["{}: line {}: {}".format(name, l, e) \
+                                 for l, e in errors]
+            result["parms"] += ["{}: {}".format(name, str(r).split('\n')[0]) \
+                                for r in reports if r]
+
+            writer = assets.SectionWriter(definition)
+            if writer.is_unchanged("Help", new_help):
+                continue
+
+            if not dry_run:
+                writer.stage("Help", new_help)
+                writer.commit()
+            result["updated"] += 1
+
+    except Exception:
+        result["errors"].append(traceback.format_exc())
+
+    result["time"] = time.time() - start
+    return result
+
+def _process_library_args(args):
+
+    return process_library(*args)
+
+def run(files, workers=None, refresh_parms=False, dry_run=False,
+        prune=False, stream=sys.stdout):
+    """ Process the given library files, one file per worker process.
+        With workers == 1 everything runs in the current process.
+        Return the list of per file results.
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    workers = max(1, min(workers, len(files)))
+
+    start = time.time()
+    tasks = [(f, refresh_parms, dry_run, prune) for f in files]
+
+    if workers == 1:
+        results = [_process_library_args(t) for t in tasks]
+    else:
+        pool = multiprocessing.Pool(processes=workers, maxtasksperchild=1)
+        try:
+            results = list(pool.imap_unordered(_process_library_args, tasks))
+        finally:
+            pool.close()
+            pool.join()
+
+    elapsed = time.time() - start
+
+    n_defs = 0
+    n_updated = 0
+    for r in results:
+        n_defs += r["definitions"]
+        n_updated += r["updated"]
+        stream.write("{path}: {definitions} definition(s), {updated} updated, "
+                     "{skipped} skipped ({time:.2f}s)\n".format(**r))
+        for p in r["parms"]:
+            stream.write("    PARMS: " + p + "\n")
+        for e in r["errors"]:
+            stream.write("    ERROR: " + e + "\n")
+
+    rate = n_defs / elapsed if elapsed > 0 else 0.0
+    stream.write("{} definition(s) in {} file(s), {} updated, {:.2f}s, "
+                 "{:.1f} definitions/s\n".format(n_defs, len(files), n_updated,
+                                                 elapsed, rate))
+    return results
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="HelpCardMaker.batch",
+                                     description="Regenerate help card maker "
+                                                 "help cards of HDA libraries.")
+    parser.add_argument("paths", nargs='+',
+                        help="Library files or directories of library files.")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Number of worker processes (default: cpu count).")
+    parser.add_argument("--parms", action="store_true",
+                        help="Merge the asset definition parameters into the "
+                             "parameters grid, keeping the edited help.")
+    parser.add_argument("--prune", action="store_true",
+                        help="With --parms, drop the parameters which are not "
+                             "in the asset anymore.")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="Report what would be updated without saving.")
+    args = parser.parse_args(argv)
+
+    files = find_libraries(args.paths)
+    if not files:
+        sys.stderr.write("No library file found.\n")
+        return 1
+
+    results = run(files, workers=args.workers, refresh_parms=args.parms,
+                  dry_run=args.dry_run, prune=args.prune)
+
+    return 1 if any(r["errors"] for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,7 @@
 import hou
 import os
-import tempfile
-import uuid
 import traceback
+import contextlib
 from collections import OrderedDict
 
 from PySide2 import QtGui
@@ -12,7 +11,9 @@ from PySide2 import QtWidgets
 from HelpCardMaker.utils import *
 
 class WidgetInterface(object):
-    """ Help widgets interface for drag and drop system implementation
+    """ Help widgets interface for drag and drop system implementation.
+        The serialized output of the widget and its drag thumbnail are
+        cached until an edit calls invalidate_output().
     """
     
     def __init__(self, idx, show_handle=True, parent=None):
@@ -21,6 +22,8 @@ class WidgetInterface(object):
 
         self.top_w = parent
         self.idx = idx
+        self._output = None
+        self._thumbnail = None
         self.setAcceptDrops(True)
         self.show_handle = show_handle
 
@@ -66,11 +69,45 @@ class WidgetInterface(object):
         
         self.top_w.remove_widget(self)
 
+    def cached_output(self):
+
+        if self._output is None:
+            self._output = self.output()
+        return self._output
+
+    def invalidate_output(self, *args):
+        """ Drop the cached output of the widget and of the widgets it is
+            part of, the panel is notified for the top level blocks.
+        """
+        self._output = None
+        self._thumbnail = None
+
+        owner = self.top_w
+        if isinstance(owner, WidgetInterface):
+            owner.invalidate_output()
+        elif hasattr(owner, "block_changed"):
+            owner.block_changed(self)
+
+    def drag_thumbnail(self):
+        """ Thumbnail shown while the block is dragged, rendered again only
+            when the block has been edited or resized.
+        """
+        key = (self.width(), self.height())
+        if self._thumbnail is None or self._thumbnail[0] != key:
+            self._thumbnail = (key, render_thumbnail(self))
+        return self._thumbnail[1]
+
+    def write_sections(self, writer):
+        """ Stage the asset sections referenced by the block ( images,
+            icons ) to the given assets.SectionWriter, output() itself
+            has no side effect.
+        """
+        return
+
     def create_delete_btn(self):
 
         self.delete_btn = QtWidgets.QToolButton()
-        self.delete_btn.setStyleSheet("""QToolButton{background-color:
-                                    transparent;border: 0px}""")
+        self.delete_btn.setObjectName("flatButton")
         self.delete_btn.setIcon(get_icon("close"))
         self.delete_btn.clicked.connect(self.remove_me)
         self.main_layout.addWidget(self.delete_btn)
@@ -85,7 +122,7 @@ class ScrollWidget(QtWidgets.QWidget):
         self.setAcceptDrops(True)
         self.setAutoFillBackground(True)
         self.top_w = parent
-        self.setStyleSheet("""QWidget{background-color: white;}""")
+        self.setObjectName("scrollWidget")
         self.setFocus()
         
     def mousePressEvent(self, event):
@@ -102,10 +139,7 @@ class ScrollWidget(QtWidgets.QWidget):
                 if img.isNull():
                     return super(ScrollWidget, self).keyPressEvent(event)
 
-                temp = tempfile.gettempdir() + os.sep + uuid.uuid4().hex + ".png"
-
-                img.save(temp)
-                self.top_w.add_image_from_clip(temp)
+                self.top_w.add_image_from_clip(img)
             except Exception as e:
                 print("Invalid clipboard: " + str(e))
 
@@ -121,6 +155,214 @@ class ScrollWidget(QtWidgets.QWidget):
         if isinstance(source, ToolIcon):
             self.top_w.insert_widget(source.objectName(), -1)
 
+class HeightScheduler(object):
+    """ Coalesce the height updates of the text widgets: the widgets
+        requesting an update get their update_height() called once, on the
+        next event loop tick, whatever the number of requests.
+    """
+    def __init__(self):
+
+        self.pending = OrderedDict()
+        self.timer = None
+
+    def request(self, w):
+
+        self.pending[w] = None
+
+        if self.timer is None:
+            self.timer = QtCore.QTimer()
+            self.timer.setSingleShot(True)
+            self.timer.setInterval(0)
+            self.timer.timeout.connect(self.flush)
+
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+
+        pending = list(self.pending.keys())
+        self.pending.clear()
+
+        for w in pending:
+            try:
+                w.update_height()
+            except RuntimeError:
+                # widget deleted in the meantime
+                pass
+
+height_scheduler = HeightScheduler()
+
+class BlockContainer(object):
+    """ Ordered help widgets of the scroll area, kept in sync with its layout.
+        Positions are stored in a widget => index map, after an insertion or
+        a removal only the widgets from the changed position are renumbered,
+        and only once per batch() when several changes are made.
+        on_change is called after the blocks changed, once per batch.
+    """
+    def __init__(self, layout, on_change=None):
+
+        self.layout = layout
+        self.on_change = on_change
+        self.widgets = []
+        self._index = {}
+        # first position whose index is stale, None when up to date
+        self._dirty = None
+        self._batch = 0
+        self._changed = False
+
+    def __len__(self):
+
+        return len(self.widgets)
+
+    def __iter__(self):
+
+        return iter(list(self.widgets))
+
+    def __getitem__(self, i):
+
+        return self.widgets[i]
+
+    def __contains__(self, w):
+
+        return w in self._index
+
+    @contextlib.contextmanager
+    def batch(self):
+        """ Group several changes: the layout is disabled and the scroll area
+            not repainted, the widgets are renumbered and laid out once at
+            the end.
+        """
+        parent = self.layout.parentWidget()
+        updates = parent.updatesEnabled() if parent else False
+
+        self._batch += 1
+        if self._batch == 1:
+            self.layout.setEnabled(False)
+            if parent:
+                parent.setUpdatesEnabled(False)
+        try:
+            yield self
+        finally:
+            self._batch -= 1
+            if self._batch == 0:
+                self._renumber()
+                self.layout.setEnabled(True)
+                self.layout.activate()
+                if parent:
+                    parent.setUpdatesEnabled(updates)
+                self._notify()
+
+    def index(self, w):
+
+        self._renumber()
+        return self._index[w]
+
+    def _invalidate(self, pos):
+
+        if self._dirty is None or pos < self._dirty:
+            self._dirty = pos
+        self._changed = True
+        if not self._batch:
+            self._renumber()
+            self._notify()
+
+    def _notify(self):
+
+        if self._changed and self.on_change:
+            self.on_change()
+        self._changed = False
+
+    def _renumber(self):
+
+        if self._dirty is None:
+            return
+        for i in range(self._dirty, len(self.widgets)):
+            w = self.widgets[i]
+            self._index[w] = i
+            w.idx = i
+        self._dirty = None
+
+    def insert(self, pos, w):
+        """ Insert a widget at the given position, appended if pos is -1.
+        """
+        if pos < 0 or pos > len(self.widgets):
+            pos = len(self.widgets)
+
+        self.widgets.insert(pos, w)
+        self._index[w] = pos
+        self.layout.insertWidget(pos, w)
+        self._invalidate(pos)
+
+    def append(self, w):
+
+        self.insert(-1, w)
+
+    def extend(self, widgets):
+
+        with self.batch():
+            for w in widgets:
+                self.append(w)
+
+    def remove(self, w, delete=True):
+
+        if w not in self._index:
+            return False
+
+        pos = self.index(w)
+        self.widgets.pop(pos)
+        del self._index[w]
+
+        self.layout.removeWidget(w)
+        w.setParent(None)
+        if delete:
+            w.deleteLater()
+
+        self._invalidate(pos)
+        return True
+
+    def replace(self, old, new, delete=True):
+        """ Put a new widget at the position of old, the other widgets
+            are not renumbered.
+        """
+        pos = self.index(old)
+        self.widgets[pos] = new
+        del self._index[old]
+        self._index[new] = pos
+        new.idx = pos
+
+        self.layout.replaceWidget(old, new)
+        old.setParent(None)
+        if delete:
+            old.deleteLater()
+
+    def move(self, idx_from, idx_to):
+
+        if not 0 <= idx_from < len(self.widgets):
+            return
+
+        w = self.widgets[idx_from]
+        with self.batch():
+            self.remove(w, delete=False)
+            self.insert(idx_to, w)
+
+    def clear(self, delete=True):
+        """ Remove all the widgets, the layout items are taken from the end
+            so no item is shifted.
+        """
+        with self.batch():
+            for i in reversed(range(self.layout.count())):
+                self.layout.takeAt(i)
+
+            for w in self.widgets:
+                w.setParent(None)
+                if delete:
+                    w.deleteLater()
+
+            self.widgets = []
+            self._index = {}
+            self._dirty = None
+            self._changed = True
+
 class OnThisPageEntry(QtWidgets.QLabel):
 
     def __init__(self, target_widget=None, text="None", parent=None):
@@ -130,15 +372,15 @@ class OnThisPageEntry(QtWidgets.QLabel):
         self.target_widget = target_widget
 
         self.setText(text)
+        self.setObjectName("onThisPageEntry")
 
         self.setSizePolicy(QtWidgets.QSizePolicy.Minimum,
                                QtWidgets.QSizePolicy.Minimum)
-        self.setStyleSheet("""QLabel{color: #1782ba;}
-                              QLabel:hover{color: #349ed5;}""")
         
     def mousePressEvent(self, event):
 
-        self.top_w.top_w.scroll_area.ensureWidgetVisible(self.target_widget)
+        panel = self.top_w.top_w
+        self.target_widget = panel.ensure_block_visible(self.target_widget)
 
     def update_text(self, text):
 
@@ -153,14 +395,12 @@ class OnThisPage(QtWidgets.QWidget):
 
         self.main_layout = QtWidgets.QVBoxLayout()
         self.main_lbl = QtWidgets.QLabel("On This Page")
-        self.main_lbl.setStyleSheet("""QLabel{color: rgb(250, 150, 0);
-                                              font-weight: bold}""")
+        self.main_lbl.setObjectName("onThisPageTitle")
         self.main_layout.addWidget(self.main_lbl)
 
         self.bg_frame = QtWidgets.QFrame()
         self.bg_frame.setAutoFillBackground(True)
-        self.bg_frame.setStyleSheet("""QFrame{background-color: #f3f3f3;
-                                              border-radius: 10px}""")
+        self.bg_frame.setObjectName("onThisPageFrame")
         #self.bg_frame.setContentsMargins(5,5,5,5)
         self.bg_layout = QtWidgets.QVBoxLayout()
         self.bg_layout.setSpacing(5)
@@ -178,6 +418,35 @@ class OnThisPage(QtWidgets.QWidget):
         self.bg_layout.insertWidget(idx, entry)
         self.entries.append(entry)
 
+# height in pixels of the drag thumbnail of the blocks taller than
+# twice this height, smaller blocks are rendered entirely
+THUMBNAIL_HEIGHT = 100
+
+def render_thumbnail(widget):
+    """ Render the top of the widget with a small gradient as alpha mask,
+        only the cropped region is painted whatever the widget height.
+    """
+    w = widget.width()
+    h = widget.height()
+    if h >= THUMBNAIL_HEIGHT * 2:
+        h = THUMBNAIL_HEIGHT
+
+    pix = QtGui.QPixmap(max(1, w), max(1, h))
+    pix.fill(QtCore.Qt.transparent)
+    widget.render(pix, QtCore.QPoint(), QtGui.QRegion(0, 0, w, h))
+
+    gradient = QtGui.QLinearGradient(QtCore.QPointF(0, 0), QtCore.QPointF(0, h))
+    gradient.setColorAt(0, QtGui.QColor(0, 0, 0, 200))
+    gradient.setColorAt(0.5, QtGui.QColor(0, 0, 0, 200))
+    gradient.setColorAt(1, QtGui.QColor(0, 0, 0, 0))
+
+    painter = QtGui.QPainter(pix)
+    painter.setCompositionMode(QtGui.QPainter.CompositionMode_DestinationIn)
+    painter.fillRect(pix.rect(), QtGui.QBrush(gradient))
+    painter.end()
+
+    return pix
+
 class WidgetHandle(QtWidgets.QFrame):
 
     def __init__(self, idx=0, parent=None):
@@ -185,45 +454,13 @@ class WidgetHandle(QtWidgets.QFrame):
 
         self.widget = parent
         self.setObjectName("handle")
-        self.setStyleSheet("""QFrame#handle{background-color: #eaeaea;}
-                              QFrame#handle:hover{background-color: #d5dae5;}""")
         self.setFixedWidth(10)
 
     def mousePressEvent(self, event):
-        """ Init the drag and drop system for reordering widgets.
-            Limite the size of the thumbnail's pixmap to 200pix height
-            Add a small gradient as alpha mask.
+        """ Init the drag and drop system for reordering widgets, the
+            thumbnail is cached by the widget, see drag_thumbnail().
         """
-        widget_size = self.widget.size()
-
-        w_h = widget_size.height()
-        pix_h = 100
-        if w_h < 200: pix_h = w_h
-
-        pix_w = widget_size.width()
-
-        mask_pix = QtGui.QPixmap(QtCore.QSize(pix_w, pix_h))
- 
-        w_pix = QtGui.QPixmap(widget_size)
-        self.widget.render(w_pix)
-
-        painter	= QtGui.QPainter(mask_pix)
-        
-        gradient = QtGui.QLinearGradient(QtCore.QPointF(mask_pix.rect().topLeft()),
-				                   QtCore.QPointF(mask_pix.rect().bottomLeft()))
-        gradient.setColorAt(0, QtGui.QColor(200, 200, 200))
-        gradient.setColorAt(0.5, QtGui.QColor(200, 200, 200))
-        gradient.setColorAt(1, QtCore.Qt.black)
-        brush = QtGui.QBrush(gradient)
-        
-        painter.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
-        painter.fillRect(QtCore.QRectF(0, 0, pix_w, pix_h), w_pix)
-        
-        painter.setCompositionMode(QtGui.QPainter.CompositionMode_DestinationIn)
-        painter.fillRect(QtCore.QRectF(0, 0, pix_w, pix_h), brush) 
-        painter.end()
-        
-        pix = w_pix.copy(0, 0, pix_w, pix_h)
+        pix = self.widget.drag_thumbnail()
 
         mimeData = QtCore.QMimeData()
         mimeData.setText("%W%;" + str(self.widget.idx))
@@ -245,7 +482,7 @@ class ToolIcon(QtWidgets.QLabel):
 
         self.setFixedHeight(34)
         self.setFixedWidth(34)
-        self.icon_pix = get_icon(icon).pixmap(32,32)
+        self.icon_pix = get_pixmap(icon, 32, 32)
         self.setPixmap(self.icon_pix)
         self.widget_type = widget_type
 
@@ -259,37 +496,6 @@ class ToolIcon(QtWidgets.QLabel):
         drag.setHotSpot(event.pos() - self.rect().topLeft())
         drag.start(QtCore.Qt.MoveAction)
 
-class CLabel(QtWidgets.QWidget):
-    """ Utilitiy label with output() method to be compatible with
-        other help widgets.
-    """
-    def __init__(self, text="", show_btn=True, parent=None):
-        super(CLabel, self).__init__(parent=parent)
-
-        self.top_w = parent
-
-        layout = QtWidgets.QHBoxLayout()
-        layout.setAlignment(QtCore.Qt.AlignLeft)
-        self.lbl = QtWidgets.QLabel(text)
-        layout.addWidget(self.lbl)
-
-        delete_btn = QtWidgets.QToolButton()
-        delete_btn.setStyleSheet("""QToolButton{background-color:
-                                    transparent;border: 0px}""")
-        delete_btn.setIcon(get_icon("close"))
-        delete_btn.clicked.connect(self.remove_me)
-        layout.addWidget(delete_btn)
-
-        self.setLayout(layout)
-
-    def remove_me(self):
-
-        self.top_w.remove_widget(self)
-
-    def output(self):
-
-        return "\n" + self.lbl.text() + "\n"
-
 class ColorChooser(QtWidgets.QDialog):
     """ Custom color picker with button. Parse the given color_class
         to fetch which colors are available.
@@ -3,79 +3,195 @@ VERSION = HelpCardMaker.__version__
 
 import hou
 import os
-import tempfile
-import uuid
+import difflib
+import functools
 import traceback
 from collections import OrderedDict
 
-try:
-    from pygments import highlight
-    from pygments.lexers import PythonLexer, CppLexer
-    from pygments.formatters import HtmlFormatter
-    _highlight_available = True
-except ImportError:
-    _highlight_available = False
-
 from PySide2 import QtGui
 from PySide2 import QtCore
 from PySide2 import QtWidgets
 
-from HelpCardMaker import core
-reload(core)
-from HelpCardMaker import utils
-reload(utils)
-
-from HelpCardMaker.ui import *
+from HelpCardMaker import model
+from HelpCardMaker import assets
+from HelpCardMaker import images
+from HelpCardMaker import highlight
+from HelpCardMaker import styles
+from HelpCardMaker import parms
 from HelpCardMaker.core import *
 from HelpCardMaker.utils import *
 
+class TextView(QtWidgets.QLabel):
+    """ Static text painted by a TextBlock when it is not edited, the
+        editor is created when the view gets the focus.
+    """
+    def __init__(self, text="", parent=None):
+        super(TextView, self).__init__(parent=parent)
+
+        self.block = parent
+        self.setObjectName("textView")
+        self.setTextFormat(QtCore.Qt.PlainText)
+        self.setWordWrap(True)
+        self.setText(text)
+        self.setAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop)
+        self.setContentsMargins(4,4,4,4)
+        self.setMinimumHeight(self.fontMetrics().height() + 8)
+        self.setFocusPolicy(QtCore.Qt.StrongFocus)
+        self.setCursor(QtCore.Qt.IBeamCursor)
+        self.setSizePolicy(QtWidgets.QSizePolicy.Expanding,
+                           QtWidgets.QSizePolicy.Minimum)
+        self.click_pos = None
+
+    def mousePressEvent(self, event):
+
+        self.click_pos = event.pos()
+        super(TextView, self).mousePressEvent(event)
+
+    def focusInEvent(self, event):
+
+        super(TextView, self).focusInEvent(event)
+        self.block.start_editing(self.click_pos)
+        self.click_pos = None
+
 class TextBlock(QtWidgets.QWidget, WidgetInterface):
     """ Basic automatically resizable text block used for multilines
         string texts.
+        When lazy, the text is painted by a TextView and the QTextEdit is
+        only created while the block has the focus.
     """
     
     text_changed_sgn = QtCore.Signal(str)
 
-    def __init__(self, text="Text", idx=0, show_btn=True, parent=None):
+    # set while a help card is loaded, the heights are then updated in
+    # one pass by MainPanel.size_text_blocks()
+    suspend_sizing = False
+
+    def __init__(self, text="Text", idx=0, show_btn=True, lazy=True,
+                 parent=None):
         super(TextBlock, self).__init__(parent=parent)
         WidgetInterface.__init__(self, idx, show_handle=show_btn, parent=parent)
 
-        self.text = QtWidgets.QTextEdit()
-        self.text.textChanged.connect(self._emit_sgn)
-        self.text.setAcceptDrops(False)
+        self._text = text
+        self._height = None
+        self.lazy = lazy
 
-        doc = QtGui.QTextDocument()
-        doc.setPlainText(text)
+        # set by the owner widget to override the editor's keyPressEvent
+        self.key_press_handler = None
 
-        self.text.setDocument(doc)
-        self.text.updateGeometry()
-        h = self.text.document().size().height()
-        self.text.setMaximumHeight(h)
-        
-        self.text.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
-        self.text.setWordWrapMode(QtGui.QTextOption.WordWrap)
-        self.text.setLineWrapMode(QtWidgets.QTextEdit.LineWrapMode.WidgetWidth)
-        self.text.setSizePolicy(QtWidgets.QSizePolicy.Minimum,
-                                QtWidgets.QSizePolicy.MinimumExpanding)
-        self.setStyleSheet("""QTextEdit{background-color: transparent;
-                                         border: 0px;
-                                         color: black}
-                               QTextEdit:hover{background-color: rgba(0,0,80,16)}""")
-        self.main_layout.addWidget(self.text)
+        self.editor = None
+        self.view = None
+        if lazy:
+            self.view = TextView(text, parent=self)
+            self.main_layout.addWidget(self.view)
+        else:
+            self.editor = self.create_editor()
+            self.main_layout.addWidget(self.editor)
+
+        self.setObjectName("TextBlock")
         
         if show_btn:
             self.create_delete_btn()
         
         self.setLayout(self.main_layout)
 
+    def create_editor(self):
+
+        editor = QtWidgets.QTextEdit()
+        editor.setAcceptDrops(False)
+
+        doc = QtGui.QTextDocument(editor)
+        doc.setPlainText(self._text)
+        editor.setDocument(doc)
+
+        editor.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        editor.setWordWrapMode(QtGui.QTextOption.WordWrap)
+        editor.setLineWrapMode(QtWidgets.QTextEdit.LineWrapMode.WidgetWidth)
+        editor.setSizePolicy(QtWidgets.QSizePolicy.Minimum,
+                             QtWidgets.QSizePolicy.MinimumExpanding)
+        editor.setMaximumHeight(doc.size().height())
+
+        editor.textChanged.connect(self._emit_sgn)
+        editor.textChanged.connect(self.invalidate_output)
+        doc.documentLayout().documentSizeChanged.connect(self.schedule_height)
+        if self.key_press_handler:
+            editor.keyPressEvent = self.key_press_handler
+        if self.lazy:
+            editor.installEventFilter(self)
+
+        return editor
+
+    def start_editing(self, pos=None):
+        """ Swap the static view for an editor, pos is the clicked position
+            in the view, used to place the text cursor.
+        """
+        if self.editor is not None:
+            return
+
+        self.editor = self.create_editor()
+        self._height = None
+        self.main_layout.replaceWidget(self.view, self.editor)
+        self.view.hide()
+        self.editor.show()
+        self.main_layout.activate()
+        self.update_height()
+
+        if pos is not None:
+            self.editor.setTextCursor(self.editor.cursorForPosition(pos))
+        else:
+            self.editor.moveCursor(QtGui.QTextCursor.End)
+        self.editor.setFocus()
+
+    def stop_editing(self):
+        """ Release the editor and its document, the text is painted by the
+            static view again.
+        """
+        if self.editor is None or not self.lazy:
+            return
+
+        self._text = self.editor.toPlainText()
+        self.view.setText(self._text)
+
+        editor = self.editor
+        self.editor = None
+        editor.removeEventFilter(self)
+        self.main_layout.replaceWidget(editor, self.view)
+        editor.hide()
+        editor.deleteLater()
+        self.view.show()
+
+    def eventFilter(self, obj, event):
+
+        if obj is self.editor and event.type() == QtCore.QEvent.FocusOut and \
+           event.reason() not in (QtCore.Qt.PopupFocusReason,
+                                  QtCore.Qt.ActiveWindowFocusReason):
+            self.stop_editing()
+
+        return False
+
     def _emit_sgn(self):
 
-        self.text_changed_sgn.emit(self.text.toPlainText())
+        self.text_changed_sgn.emit(self.editor.toPlainText())
+
+    def schedule_height(self, *args):
+        """ Height updates are coalesced by core.height_scheduler, the height
+            is only set when the document height changed.
+        """
+        if not TextBlock.suspend_sizing and self.editor is not None:
+            height_scheduler.request(self)
 
     def update_height(self):
+        """ Fit the editor to its document, the static view follows its
+            text without any fixed height.
+        """
+        if self.editor is None:
+            return
 
-        h = self.text.document().size().height()
-        self.text.setFixedHeight(h)
+        h = self.editor.document().size().height()
+        if h == self._height:
+            return
+        self._height = h
+        margins = self.editor.height() - self.editor.viewport().height()
+        self.editor.setFixedHeight(h + max(0, margins))
 
     def dropEvent(self, event):
         return #WidgetInterface.dropEvent(self, event)
@@ -86,23 +202,24 @@ class TextBlock(QtWidgets.QWidget, WidgetInterface):
     def dragMoveEvent(self, event):
         return #WidgetInterface.dragMoveEvent(self, event)
 
-    def keyReleaseEvent(self, event):
-
-        self.update_height()
-        super(TextBlock, self).keyReleaseEvent(event)
-
     def resizeEvent(self, event):
 
-        self.update_height()
+        self.schedule_height()
         super(TextBlock, self).resizeEvent(event)
 
     def toPlainText(self):
 
-        return self.text.toPlainText()
+        if self.editor is not None:
+            return self.editor.toPlainText()
+        return self._text
+
+    def data(self):
+
+        return model.TextBlockData(text=self.toPlainText())
 
     def output(self):
-        allFormats = self.text.document().allFormats()
-        return '//TEXTBLOCK\n' + self.text.toPlainText()
+
+        return self.data().serialize()
 
 class MainTitle(QtWidgets.QWidget, WidgetInterface):
 
@@ -116,8 +233,7 @@ class MainTitle(QtWidgets.QWidget, WidgetInterface):
         self.text = QtWidgets.QLineEdit()
         self.text.setAcceptDrops(False)
 
-        self.extra_infos = ""
-        self.asset = asset 
+        self.asset = asset
         self.main_icon_section = icon
         self.main_icon_data = icon_data
 
@@ -130,7 +246,7 @@ class MainTitle(QtWidgets.QWidget, WidgetInterface):
             if context == "object":
                 context = "obj"
 
-        self.extra_infos += "#type: node\n#context: " + context + '\n'
+        self.context = context
 
         if not self.main_icon_data:
             self.fetch_icon()
@@ -144,21 +260,14 @@ class MainTitle(QtWidgets.QWidget, WidgetInterface):
         self.main_layout.addWidget(icon_lbl)
 
         self.text.setText(text)
-        self.setStyleSheet("""QLineEdit{background-color: transparent;
-                                         border: 0px;
-                                         color: black;
-                                         font-size: 12pt;
-                                         font-family: Arial;;
-                                         font-weight: bold}
-                              QLineEdit:hover{background-color: rgba(0,0,80,16)}""")
+        self.text.textChanged.connect(self.invalidate_output)
+        self.setObjectName("MainTitle")
         text_layout.addWidget(self.text)
 
         k = self.asset.type().category().name().lower()
         context_txt = CONTEXT_REMAP.get(k, "Unknown category node")
         context_lbl = QtWidgets.QLabel(context_txt)
-        context_lbl.setStyleSheet("""QLabel{color: grey;
-                                            font-size: 10pt;
-                                            font-family: Arial}""")
+        context_lbl.setObjectName("mainTitleContext")
         text_layout.addWidget(context_lbl)
 
         self.main_layout.addLayout(text_layout)
@@ -187,30 +296,24 @@ class MainTitle(QtWidgets.QWidget, WidgetInterface):
         buffer.open(QtCore.QIODevice.WriteOnly)
         pix.save(buffer, "PNG")
         
-        self.main_icon_section = "HELP_CARD_ICO_" + node_def.nodeTypeName() + ".png"
+        self.main_icon_section = model.ICON_SECTION_PREFIX + node_def.nodeTypeName() + ".png"
         self.main_icon_data = str(buffer.data())
 
-    def save_icon(self):
-        """ Save icon binary data to asset extra files, also update the extra_info
-            with the icon link.
+    def write_sections(self, writer):
+        """ Stage the icon binary data to the asset extra files.
         """
-        node_type = self.asset.type()
-        node_def = node_type.definition()
-        sections = node_def.sections()
-        section = sections.get(self.main_icon_section)
-        if not section:
-            node_def.addSection(self.main_icon_section, self.main_icon_data)
-        else:
-            section.setContents(self.main_icon_data)
+        writer.stage(self.main_icon_section, self.main_icon_data)
 
-        self.extra_infos += "#icon: opdef:" + node_type.nameWithCategory()
-        self.extra_infos += "?" + self.main_icon_section
+    def data(self):
+
+        return model.MainTitleData(text=self.text.text(),
+                                   context=self.context,
+                                   node_type=self.asset.type().nameWithCategory(),
+                                   icon_section=self.main_icon_section)
 
     def output(self):
 
-        self.save_icon()
-        return "//MAINTITLE\n" + '= ' + self.text.text() + \
-                ' =\n' + self.extra_infos
+        return self.data().serialize()
 
 class Title(QtWidgets.QWidget, WidgetInterface):
     """ Simple line text input for title help widget.
@@ -224,20 +327,11 @@ class Title(QtWidgets.QWidget, WidgetInterface):
         
         self.text = QtWidgets.QLineEdit()
         self.text.setAcceptDrops(False)
-        self.extra_infos = ""
-
-        text_color = "black"
-        if title_type == TitleType.ENTRY_MENU:
-            text_color = "rgba(0,0,105)"
 
         self.text.setText(text)
-        self.setStyleSheet("""QLineEdit{background-color: transparent;
-                                         border: 0px;
-                                         color: """ + text_color + """;
-                                         font-size: """ + str(title_type) + """pt;
-                                         font-family: Arial;;
-                                         font-weight: bold}
-                              QLineEdit:hover{background-color: rgba(0,0,80,16)}""")
+        self.text.textChanged.connect(self.invalidate_output)
+        self.setObjectName("Title")
+        self.setProperty("level", title_type)
         self.main_layout.addWidget(self.text)
         
         self.create_delete_btn()
@@ -253,15 +347,14 @@ class Title(QtWidgets.QWidget, WidgetInterface):
     def dragMoveEvent(self, event):
         return WidgetInterface.dragMoveEvent(self, event)
 
+    def data(self):
+
+        return model.TitleData(text=self.text.text(),
+                               entry_menu=self.title_type == TitleType.ENTRY_MENU)
+
     def output(self):
-        
-        if self.title_type == TitleType.ENTRY_MENU:
-            return "//TITLEENTIRYMENU\n@" + \
-                   self.text.text().replace(' ', '') + ' ' + \
-                   self.text.text()
 
-        return '//TITLE\n== '+ self.text.text() + \
-               ' ' + ' =='
+        return self.data().serialize()
 
 class Bullets(QtWidgets.QWidget, WidgetInterface):
 
@@ -315,6 +408,7 @@ class Bullets(QtWidgets.QWidget, WidgetInterface):
             self.mode_btn.setIcon(get_icon("numbering"))
 
         self.refresh_bullets_icons()
+        self.invalidate_output()
 
     def add_bullet(self, w, text=""):
         
@@ -339,10 +433,12 @@ class Bullets(QtWidgets.QWidget, WidgetInterface):
             self.bullets_layout.insertWidget(idx, nw)
 
         if self.numbered:
-            self.refresh_bullets_icons()
+            self.refresh_bullets_icons(idx + 1)
+        self.invalidate_output()
 
     def remove_bullet(self, w):
 
+        idx = 0
         if w in self.bullets and len(self.bullets) > 1:
             
             idx = self.bullets.index(w)
@@ -351,22 +447,52 @@ class Bullets(QtWidgets.QWidget, WidgetInterface):
             w.deleteLater()
         
         if self.numbered:
-            self.refresh_bullets_icons()
+            self.refresh_bullets_icons(idx)
+        self.invalidate_output()
 
-    def refresh_bullets_icons(self):
-
-        for i, b in enumerate(self.bullets):
+    def refresh_bullets_icons(self, start=0):
+        """ Renumber the bullets from the index start, the ones before are
+            not affected by an insertion or a removal at start.
+        """
+        for i in range(start, len(self.bullets)):
             if self.numbered:
-                b.bullet_id = i+1
-                b.update_bullet_shape()
+                self.bullets[i].set_bullet_id(i+1)
             else:
-                b.bullet_id = 0
-                b.update_bullet_shape()
+                self.bullets[i].set_bullet_id(0)
+
+    def data(self):
+
+        return model.BulletsData(items=[w.text.toPlainText() for w in self.bullets],
+                                 numbered=self.numbered)
 
     def output(self):
+
+        return self.data().serialize()
         
-        return "//BULLETS\n" + '\n'.join([w.output() for w in self.bullets])
-        
+# number => numbered bullet pixmap, shared by all the bullets
+_bullet_glyphs = {}
+
+def get_bullet_glyph(number):
+
+    pixm = _bullet_glyphs.get(number)
+    if pixm is not None:
+        return pixm
+
+    pixm = QtGui.QPixmap(22, 22)
+    pixm.fill(QtGui.QColor(255, 255, 255, 255))
+    painter = QtGui.QPainter(pixm)
+    font = QtGui.QFont()
+    font.setBold(True)
+    font.setPixelSize(12)
+    painter.setFont(font)
+    painter.setPen(QtGui.QColor(102, 102, 102))
+    painter.setBrush(QtGui.QBrush(QtCore.Qt.SolidPattern))
+    painter.drawText(5, 12, str(number))
+    painter.end()
+
+    _bullet_glyphs[number] = pixm
+    return pixm
+
 class Bullet(QtWidgets.QWidget, WidgetInterface):
     """ Text block formatted with a small bullet icon
     """
@@ -387,58 +513,51 @@ class Bullet(QtWidgets.QWidget, WidgetInterface):
         self.main_layout.addLayout(ico_lay)
 
         self.text = TextBlock(text=text, show_btn=False, parent=self)
-        self.text.text.keyPressEvent = self._keyPressEvent
+        self.text.key_press_handler = self._keyPressEvent
         self.main_layout.addWidget(self.text)
             
         self.update_bullet_shape()
         self.setLayout(self.main_layout)
 
+    def set_bullet_id(self, bullet_id):
+
+        if bullet_id != self.bullet_id:
+            self.bullet_id = bullet_id
+            self.update_bullet_shape()
+
     def update_bullet_shape(self):
-        
+        """ The painting is scheduled by the label, not forced.
+        """
         if self.bullet_id > 0:
-            pixm = QtGui.QPixmap(22, 22)
-            pixm.fill(QtGui.QColor(255, 255, 255, 255))
-            self._painter = QtGui.QPainter(pixm)
-            font = QtGui.QFont()
-            font.setBold(True)
-            font.setPixelSize(12)
-            self._painter.setFont(font)
-            self._painter.setPen(QtGui.QColor(102, 102, 102))
-            self._painter.setBrush(QtGui.QBrush(QtCore.Qt.SolidPattern))
-            self._painter.drawText(5, 12, str(self.bullet_id))
-            self._painter.end()
-            self.ico.setPixmap(pixm)
+            self.ico.setPixmap(get_bullet_glyph(self.bullet_id))
         else:
-            self.ico.setPixmap(get_icon("s_dot").pixmap(6,6))
-
-        self.ico.update()
-        self.ico.repaint()
+            self.ico.setPixmap(get_pixmap("s_dot", 6, 6))
 
     def _keyPressEvent(self, e):
         
         if e.key() in [QtCore.Qt.Key_Return, QtCore.Qt.Key_Enter]:
 
-            doc = self.text.text.document()
-            cursor = self.text.text.textCursor()
+            editor = self.text.editor
+            cursor = editor.textCursor()
             cursor.movePosition(QtGui.QTextCursor.EndOfBlock,
                                 QtGui.QTextCursor.KeepAnchor,
                                 QtGui.QTextCursor.End)
             cursor.select(QtGui.QTextCursor.WordUnderCursor)
             txt = cursor.selectedText()
-            if txt != self.text.text.toPlainText():
+            if txt != editor.toPlainText():
                 cursor.removeSelectedText()
-                self.text.text.setTextCursor(cursor)
+                editor.setTextCursor(cursor)
                 self.top_w.add_bullet(self, txt)
             else:
                 self.top_w.add_bullet(self)
 
         elif e.key() == QtCore.Qt.Key_Backspace:
-            if self.text.text.toPlainText() == "":
+            if self.text.editor.toPlainText() == "":
                 self.top_w.remove_bullet(self)
             else:
-                QtWidgets.QTextEdit.keyPressEvent(self.text.text, e)
+                QtWidgets.QTextEdit.keyPressEvent(self.text.editor, e)
         else:
-            QtWidgets.QTextEdit.keyPressEvent(self.text.text, e)
+            QtWidgets.QTextEdit.keyPressEvent(self.text.editor, e)
 
     def dropEvent(self, event):
         return WidgetInterface.dropEvent(self, event)
@@ -473,13 +592,13 @@ class _tiw(QtWidgets.QFrame, WidgetInterface):
         self.icon = "tips"
         self.icon_lbl = "Tip"
         self.color_n = "yellow"
-        self.color = Colors.YELLOW
-        self.color_bg = Colors.GREEN_LIGHT
         self.type = "TIP"
 
     def init_widget(self):
 
         self.setAcceptDrops(True)
+        self.setObjectName("Callout")
+        self.setProperty("kind", self.type)
 
         tips_layout = QtWidgets.QVBoxLayout()
 
@@ -489,27 +608,17 @@ class _tiw(QtWidgets.QFrame, WidgetInterface):
 
         v_sep = wSep(orientation=QtCore.Qt.Vertical)
         v_sep.setFixedWidth(2)
+        v_sep.setObjectName("calloutBar")
         self.main_layout.addWidget(v_sep)
 
         tip_ico = QtWidgets.QLabel("")
         tip_ico.setFixedHeight(16)
         tip_ico.setFixedWidth(16)
-        tip_ico.setPixmap(get_icon(self.icon).pixmap(16,16))
+        tip_ico.setPixmap(get_pixmap(self.icon, 16, 16))
         tip_lbl_lay.addWidget(tip_ico)
         tip_lbl = QtWidgets.QLabel(self.icon_lbl)
+        tip_lbl.setObjectName("calloutLabel")
         tip_lbl_lay.addWidget(tip_lbl)
-        color_str = ','.join([str(self.color.red()),
-                              str(self.color.green()),
-                              str(self.color.blue())])
-        color_bg_str = ','.join([str(self.color_bg.red()),
-                                 str(self.color_bg.green()),
-                                 str(self.color_bg.blue())])
-
-        tip_lbl.setStyleSheet("""QLabel{color: rgba(""" + color_str + """,255);
-                                        font-size: 11pt;
-                                        font-weight: bold;}""")
-        self.setStyleSheet("""QFrame{background-color: rgba(""" + color_bg_str + """,255);}""")
-        v_sep.setStyleSheet("background-color: rgba(" + color_str + ",255)")
         
         tips_layout.addItem(tip_lbl_lay)
 
@@ -530,12 +639,15 @@ class _tiw(QtWidgets.QFrame, WidgetInterface):
     def dragMoveEvent(self, event):
         return WidgetInterface.dragMoveEvent(self, event)
 
+    def data(self):
+
+        return model.CalloutData(kind=self.type,
+                                 text=self.text.toPlainText(),
+                                 display=self.color_n)
+
     def output(self):
 
-        return "//"+ self.type + "\n" + \
-               self.type + ":\n    #display: " + \
-               self.color_n + "\n    " + \
-               self.text.text.toPlainText()
+        return self.data().serialize()
 
 class Tips(_tiw):
     """ Tips formatted help text ( with bulb icon )
@@ -554,8 +666,6 @@ class Note(_tiw):
         self.icon = "info"
         self.icon_lbl = "Info"
         self.color_n = "blue"
-        self.color = Colors.BLUE
-        self.color_bg = Colors.PURPLE_LIGHT
         self.type = "NOTE"
 
 class Warning(_tiw):
@@ -569,8 +679,6 @@ class Warning(_tiw):
         self.icon = "warning"
         self.icon_lbl = "Warning"
         self.color_n = "red"
-        self.color = Colors.RED
-        self.color_bg = Colors.RED_LIGHT
         self.type = "WARNING"
 
 class Parameters(QtWidgets.QWidget, WidgetInterface):
@@ -585,13 +693,18 @@ class Parameters(QtWidgets.QWidget, WidgetInterface):
 
         Only the parameters with help tool and visible are fetched.
         The help value can by edited.
+        The parameters are scanned from the node's parm template group, or
+        from the given asset definition when there is no node instance.
+        Rows are held by a ParmsTableModel and painted by a ParmsTableView,
+        an editor is only created for the help cell being edited.
     """
-    def __init__(self, node=None, idx=0, parms_dict=None, parent=None):
+    def __init__(self, node=None, idx=0, parms_dict=None, definition=None,
+                 parent=None):
         super(Parameters, self).__init__(parent=parent)
         WidgetInterface.__init__(self, idx, parent=parent)
-        
-        self.parm_blocks = []
-        self.widgets = []
+
+        self.node = node
+        self.definition = definition
         
         self.setAutoFillBackground(True)
 
@@ -599,85 +712,10 @@ class Parameters(QtWidgets.QWidget, WidgetInterface):
         # when help card is read.
         self.parms_dict = parms_dict
         if not self.parms_dict:
-
-            self.parms = node.parms()
-            self.parm_tuples = node.parmTuples()
-            tmp_names = []
-            self.parms_dict = OrderedDict()
-            self.parms_dict["_NO_FOLDER_"] = []
-            
-            # create folders
-            for p in [_p for _p in self.parm_tuples if \
-                      _p.parmTemplate().type() in FOLDER_TYPES]:
-
-                t = p.parmTemplate()
-                if t.folderType() in MULTIPARM_TYPES:
-                    continue
-
-                lbl = t.label()
-                if lbl:
-                    self.parms_dict[lbl] = []
-
-            # parse parameters and multiparms
-            for p in self.parms:
-
-                t = p.parmTemplate()
-
-                # skip multiparm instances, the first parameter will be fetched from
-                # multiparm parameter itself
-                if p.isMultiParmInstance():
-                    continue
-            
-                # fetch multiparms
-                if t.type() == hou.parmTemplateType.Folder and \
-                   t.folderType() in MULTIPARM_TYPES:
-                    
-                    instances = p.multiParmInstances()
-                    if not instances: continue
-                    
-                    nInstances = p.eval()  # number of block instances
-                    nParms = len(instances) / nInstances
-
-                    mParms = []
-                    for i in range(nParms):
-                        _p = instances[i]
-                        _t = _p.parmTemplate()
-                        mParms.append([_t.label(), _t.help()])
-
-                    self.parms_dict[t.label() + " (multiparm)"] = mParms
-
-                # skip folders and parm with no help set or invisible
-                if t.type() in [hou.parmTemplateType.FolderSet,
-                                hou.parmTemplateType.Folder]:
-                    continue
-
-                help = t.help()
-                if not help:
-                    continue
-
-                if t.isHidden():
-                    continue
-            
-                # fetch name and label, remove last digit when parm is vector
-                # if name already in tmp_name: skip it ( used for vector )
-                t_name = t.name()
-                if t.numComponents() > 1:
-                    t_name = t_name[:-1]
-                if t_name in tmp_names:
-                    continue
-                tmp_names.append(t_name)
-                t_label = t.label()
-
-                # populate parms / folder dictionary
-                container = p.containingFolders()
-                if len(container) == 0:
-                    self.parms_dict["_NO_FOLDER_"].append([t_label, help])
-                else:
-                    container = container[-1]
-                    if container not in self.parms_dict.keys():
-                        self.parms_dict[container] = [[t_label, help]]
-                    else:
-                        self.parms_dict[container].append([t_label, help])
+            if node is not None:
+                self.parms_dict = parms.scan_node(node)
+            else:
+                self.parms_dict = parms.scan_definition(definition)
 
         self.top_w = parent
         self.setContentsMargins(0,0,0,0)
@@ -685,41 +723,25 @@ class Parameters(QtWidgets.QWidget, WidgetInterface):
         self.parms_layout.setContentsMargins(0,0,0,0)
         self.parms_layout.setSpacing(0)
         lbl = QtWidgets.QLabel("PARAMETERS")
-        lbl.setStyleSheet("""QLabel{background-color: Transparent;
-                                    font-family: Source Sans Pro;
-                                    color: black;
-                                    font-size: 10pt}""")
+        lbl.setObjectName("parmsLabel")
         self.parms_layout.addWidget(lbl)
         self.parms_layout.addWidget(wSep())
-        
-        # orphan params
-        for k in self.parms_dict["_NO_FOLDER_"]:
-
-            p = ParmBlock(k[0], k[1], self)
-            self.parms_layout.addWidget(p)
-            self.widgets.append(p)
-
-        for i, k in enumerate(self.parms_dict.keys()):
 
-            if k == "_NO_FOLDER_": continue
-
-            k_lbl = CLabel(k, parent=self)
-            self.parm_blocks.append(k_lbl)
-            k_lbl.setStyleSheet("""QLabel{background-color: Transparent;
-                                            font-family: Source Sans Pro; 
-                                            font-size: 10pt;
-                                            color: black;}""")
-            self.parms_layout.addWidget(k_lbl)
-            self.widgets.append(k_lbl)
-
-            for _pn, _ph in self.parms_dict[k]:
-
-                p = ParmBlock(_pn, _ph, self)
-                self.parm_blocks.append(p)
-                self.parms_layout.addWidget(p)
-                self.widgets.append(p)
+        self.parms_model = ParmsTableModel(self.parms_dict, parent=self)
+        self.parms_model.dataChanged.connect(self.invalidate_output)
+        self.parms_model.rowsInserted.connect(self.invalidate_output)
+        self.parms_model.rowsRemoved.connect(self.invalidate_output)
+        self.parms_view = ParmsTableView(self.parms_model, parent=self)
+        self.parms_layout.addWidget(self.parms_view)
 
         self.main_layout.addItem(self.parms_layout)
+
+        sync_btn = QtWidgets.QToolButton()
+        sync_btn.setObjectName("flatButton")
+        sync_btn.setIcon(get_icon("apply"))
+        sync_btn.setToolTip("Sync with the current asset parameters")
+        sync_btn.clicked.connect(self.sync)
+        self.main_layout.addWidget(sync_btn)
         
         self.create_delete_btn()
         
@@ -734,81 +756,325 @@ class Parameters(QtWidgets.QWidget, WidgetInterface):
     def dragMoveEvent(self, event):
         return WidgetInterface.dragMoveEvent(self, event)
 
-    def remove_widget(self, pb):
+    def sync(self):
+        """ Merge the current asset interface into the grid, the edited
+            help is kept, new / removed / renamed parameters are flagged.
+        """
+        if self.node is not None:
+            fresh = parms.scan_node(self.node)
+        elif self.definition is not None:
+            fresh = parms.scan_definition(self.definition)
+        else:
+            hou.ui.displayMessage("No asset to sync the parameters from")
+            return
 
-        if pb in self.widgets:
+        report = self.parms_model.sync(fresh)
+        hou.ui.displayMessage("Parameters synced", details=str(report))
 
-            pb.setParent(None)
-            self.parms_layout.removeWidget(pb)
-            self.widgets.pop(self.widgets.index(pb))
-            pb.deleteLater()
+    def data(self):
+
+        return model.ParametersData(folders=self.parms_model.folders())
 
     def output(self):
 
-        out = "//PARAMETERS\n"
-        out += "@parameters\n"
-        out += "\n".join([w.output() for w in self.widgets])
-        return out
+        return self.data().serialize()
 
-class ParmBlock(QtWidgets.QWidget):
-    """ Parameter label / help block, used in Parameters object.
+class ParmsTableModel(QtCore.QAbstractTableModel):
+    """ Table model of the Parameters grid, one row per folder label or
+        per parameter, columns are the label and the help.
+        Only the parameters help is editable.
     """
-    def __init__(self, parm_name, parm_help, parent=None):
-        super(ParmBlock, self).__init__(parent=parent)
+    FOLDER = 0
+    PARM = 1
 
-        self.parm_name = parm_name
-        self.parm_help = parm_help
-        self.top_w = parent
+    LABEL_BG = QtGui.QColor(242, 242, 242)
+    HELP_BG = QtGui.QColor(236, 236, 236)
+    STATUS_BG = {parms.ADDED: QtGui.QColor(220, 250, 185),
+                 parms.REMOVED: QtGui.QColor(255, 215, 205),
+                 parms.RENAMED: QtGui.QColor(254, 247, 215)}
 
-        layout = QtWidgets.QHBoxLayout()
-        layout.setSpacing(0)
-        layout.setContentsMargins(10,1,1,1)
-        self.setContentsMargins(0,0,0,0)
+    def __init__(self, parms_dict=None, parent=None):
+        super(ParmsTableModel, self).__init__(parent)
 
-        self.setAutoFillBackground(True)
-        
-        # parm's name
-        self.name = TextBlock(text=self.parm_name, show_btn=False, parent=self)
-        self.name.setContentsMargins(0,0,0,0)
-        self.name.text.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
-        self.name.setStyleSheet("""QTextEdit{background-color: #f2f2f2;
-                                          color: black;
-                                          font-weight: bold;
-                                          border: 0px;
-                                          font-family: Source Sans Pro;}""")
-        self.name.setMaximumWidth(200)
-        self.name.setSizePolicy(QtWidgets.QSizePolicy.Expanding,
-                                QtWidgets.QSizePolicy.Minimum)
-
-        # parm's help
-        self.help = TextBlock(text=self.parm_help, show_btn=False, parent=self)
-        self.help.setContentsMargins(0,0,0,0)
-        self.help.text.setStyleSheet("""QTextEdit{background-color: #ececec;
-                                                  color: black;
-                                                  font-family: Source Sans Pro;}""")
-        self.help.setSizePolicy(QtWidgets.QSizePolicy.Expanding,
-                                QtWidgets.QSizePolicy.Maximum)
-        
-        layout.addWidget(self.name)
-        layout.addWidget(self.help)
-        
-        self.delete_btn = QtWidgets.QToolButton()
-        self.delete_btn.setStyleSheet("""QToolButton{background-color:
-                                    transparent;border: 0px}""")
-        self.delete_btn.setIcon(get_icon("close"))
-        self.delete_btn.clicked.connect(self.remove_me)
-        layout.addWidget(self.delete_btn)
-        
-        self.setLayout(layout)
+        self.rows = self.build_rows(parms_dict or {})
 
-    def remove_me(self):
+        self.bold_font = QtGui.QFont()
+        self.bold_font.setBold(True)
 
-        self.top_w.remove_widget(self)
+    @classmethod
+    def build_rows(cls, parms_dict, statuses=None):
+        """ Rows are [kind, label, help, sync status].
+        """
+        statuses = statuses or {}
+        rows = []
+        for k, v in parms_dict.items():
+            if k != model.NO_FOLDER:
+                rows.append([cls.FOLDER, k, "", statuses.get((k, None))])
+            rows += [[cls.PARM, label, help, statuses.get((k, label))] \
+                     for label, help in v]
+        return rows
+
+    def sync(self, fresh_dict, keep_removed=True):
+        """ Merge a fresh parameters scan with parms.merge_parms(), only
+            the rows which changed are inserted, removed or updated.
+            Return the parms.SyncReport.
+        """
+        merged, statuses, report = parms.merge_parms(self.folders(), fresh_dict,
+                                                     keep_removed=keep_removed)
+        new_rows = self.build_rows(merged, statuses)
+
+        old_keys = [(r[0], r[1]) for r in self.rows]
+        new_keys = [(r[0], r[1]) for r in new_rows]
+        matcher = difflib.SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+
+        offset = 0
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+
+            if tag == "equal":
+                for k in range(i2 - i1):
+                    row = i1 + offset + k
+                    if self.rows[row] != new_rows[j1 + k]:
+                        self.rows[row] = new_rows[j1 + k]
+                        self.dataChanged.emit(self.index(row, 0),
+                                              self.index(row, 1))
+                continue
+
+            # the new rows take the place of the removed ones
+            row = i1 + offset
+            if i2 > i1:
+                self.removeRows(row, i2 - i1)
+                offset -= i2 - i1
+
+            if j2 > j1:
+                self.beginInsertRows(QtCore.QModelIndex(), row, row + j2 - j1 - 1)
+                self.rows[row:row] = new_rows[j1:j2]
+                self.endInsertRows()
+                offset += j2 - j1
+
+        return report
+
+    def folders(self):
+        """ Ordered dict folder label => [[parm label, parm help]].
+        """
+        folders = OrderedDict()
+        folders[model.NO_FOLDER] = []
+        cur_folder = model.NO_FOLDER
+
+        for kind, label, help, status in self.rows:
+            if kind == self.FOLDER:
+                cur_folder = label
+                folders[cur_folder] = []
+            else:
+                folders[cur_folder].append([label, help])
 
-    def output(self):
-        
-        return self.parm_name + ':' + \
-               "\n    " + self.help.text.toPlainText().replace('\n', '\n    ')
+        return folders
+
+    def is_folder(self, row):
+
+        return self.rows[row][0] == self.FOLDER
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+
+        if parent.isValid():
+            return 0
+        return 2
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+
+        if not index.isValid():
+            return None
+
+        kind, label, help, status = self.rows[index.row()]
+        col = index.column()
+
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            if col == 0:
+                return label
+            if kind == self.PARM:
+                return help
+            return None
+
+        if role == QtCore.Qt.FontRole and (col == 0 or kind == self.FOLDER):
+            if kind == self.PARM:
+                return self.bold_font
+            return None
+
+        if role == QtCore.Qt.BackgroundRole:
+            if status:
+                return self.STATUS_BG[status]
+            if kind == self.PARM:
+                return self.LABEL_BG if col == 0 else self.HELP_BG
+            return None
+
+        if role == QtCore.Qt.ToolTipRole and status:
+            return "Parameter " + status + " by the last sync"
+
+        if role == QtCore.Qt.TextAlignmentRole:
+            if col == 0 and kind == self.PARM:
+                return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignTop)
+            return int(QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop)
+
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+
+        row = self.rows[index.row()]
+        if index.column() != 1 or row[0] != self.PARM:
+            return False
+
+        row[2] = value
+        row[3] = None
+        self.dataChanged.emit(self.index(index.row(), 0), index)
+        return True
+
+    def flags(self, index):
+
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.column() == 1 and not self.is_folder(index.row()):
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def removeRows(self, row, count, parent=QtCore.QModelIndex()):
+
+        if row < 0 or row + count > len(self.rows):
+            return False
+
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del self.rows[row:row + count]
+        self.endRemoveRows()
+        return True
+
+class ParmHelpDelegate(QtWidgets.QStyledItemDelegate):
+    """ Multi-lines editor for the parameters help, created by the view
+        only for the cell being edited.
+    """
+    def createEditor(self, parent, option, index):
+
+        editor = QtWidgets.QPlainTextEdit(parent)
+        editor.setFrameStyle(QtWidgets.QFrame.NoFrame)
+        return editor
+
+    def setEditorData(self, editor, index):
+
+        editor.setPlainText(index.data(QtCore.Qt.EditRole) or "")
+
+    def setModelData(self, editor, model, index):
+
+        model.setData(index, editor.toPlainText(), QtCore.Qt.EditRole)
+
+class ParmsTableView(QtWidgets.QTableView):
+    """ View of a ParmsTableModel, the view is as high as its rows so the
+        help card scroll area does the scrolling. Selected rows are removed
+        with the delete key or the context menu.
+    """
+    def __init__(self, parms_model, parent=None):
+        super(ParmsTableView, self).__init__(parent)
+
+        self.setModel(parms_model)
+        self.setItemDelegateForColumn(1, ParmHelpDelegate(self))
+
+        self.horizontalHeader().hide()
+        self.verticalHeader().hide()
+        self.horizontalHeader().setStretchLastSection(True)
+        self.setColumnWidth(0, 200)
+        self.setShowGrid(False)
+        self.setWordWrap(True)
+        self.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.DoubleClicked | \
+                             QtWidgets.QAbstractItemView.EditKeyPressed)
+        self.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.setFrameStyle(QtWidgets.QFrame.NoFrame)
+        self.setSizePolicy(QtWidgets.QSizePolicy.Expanding,
+                           QtWidgets.QSizePolicy.Fixed)
+        self.setObjectName("parmsView")
+
+        # rows height follow the help column width, refreshed once per
+        # event loop when the view is resized.
+        self._resize_timer = QtCore.QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(0)
+        self._resize_timer.timeout.connect(self.refresh_rows_height)
+
+        parms_model.dataChanged.connect(self._data_changed)
+        parms_model.rowsRemoved.connect(self.update_height)
+        parms_model.rowsInserted.connect(self._rows_inserted)
+
+        self.refresh_spans()
+        self.refresh_rows_height()
+
+    def refresh_spans(self):
+
+        self.clearSpans()
+        m = self.model()
+        for row in range(m.rowCount()):
+            if m.is_folder(row):
+                self.setSpan(row, 0, 1, 2)
+
+    def refresh_rows_height(self):
+
+        self.resizeRowsToContents()
+        self.update_height()
+
+    def update_height(self, *args):
+
+        self.setFixedHeight(self.verticalHeader().length() + \
+                            2 * self.frameWidth())
+
+    def _data_changed(self, top_left, bottom_right):
+
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self.resizeRowToContents(row)
+        self.update_height()
+
+    def _rows_inserted(self, parent, first, last):
+
+        m = self.model()
+        for row in range(first, last + 1):
+            if m.is_folder(row):
+                self.setSpan(row, 0, 1, 2)
+            self.resizeRowToContents(row)
+        self.update_height()
+
+    def resizeEvent(self, event):
+
+        super(ParmsTableView, self).resizeEvent(event)
+        if event.size().width() != event.oldSize().width():
+            self._resize_timer.start()
+
+    def remove_selected_rows(self):
+
+        rows = sorted(set([i.row() for i in self.selectionModel().selectedIndexes()]))
+        for row in reversed(rows):
+            self.model().removeRow(row)
+
+    def keyPressEvent(self, event):
+
+        if event.key() in (QtCore.Qt.Key_Delete, QtCore.Qt.Key_Backspace) and \
+           self.state() != QtWidgets.QAbstractItemView.EditingState:
+            self.remove_selected_rows()
+            return
+
+        super(ParmsTableView, self).keyPressEvent(event)
+
+    def contextMenuEvent(self, event):
+
+        menu = QtWidgets.QMenu(self)
+        remove_action = menu.addAction(get_icon("close"), "Remove row(s)")
+        if menu.exec_(event.globalPos()) == remove_action:
+            self.remove_selected_rows()
 
 class Separator(QtWidgets.QWidget, WidgetInterface):
     """ Simple horizontal separator line help widget
@@ -827,11 +1093,9 @@ class Separator(QtWidgets.QWidget, WidgetInterface):
 
         self.create_delete_btn()
 
+        self.setObjectName("Separator")
         self.setLayout(self.main_layout)
 
-        self.setStyleSheet("""QWidget{background-color: transparent;color:black}
-                              QWidget:hover{background-color: rgba(0,0,80,16)}""")
-
     def dropEvent(self, event):
         return WidgetInterface.dropEvent(self, event)
 
@@ -843,11 +1107,11 @@ class Separator(QtWidgets.QWidget, WidgetInterface):
 
     def data(self):
 
-        return {"type":"Separator"}
+        return model.SeparatorData()
 
     def output(self):
 
-        return '//SEPARATOR\n~~~'
+        return self.data().serialize()
 
 class TextBox(QtWidgets.QFrame, WidgetInterface):
     """ Text block formatted in a rounded edges colored box.
@@ -858,7 +1122,6 @@ class TextBox(QtWidgets.QFrame, WidgetInterface):
         WidgetInterface.__init__(self, idx, parent=parent)
 
         self.setAutoFillBackground(True)
-        self.color = getattr(BoxColors, color_str.upper())
         self.color_str = color_str
         
         layout = QtWidgets.QVBoxLayout()
@@ -866,28 +1129,19 @@ class TextBox(QtWidgets.QFrame, WidgetInterface):
 
         self.title = title
         self.title_input = TextBlock(text=title, show_btn=False, parent=self)
-        self.title_input.setStyleSheet("""QTextEdit{background-color: transparent;
-                                         border: 0px;
-                                         color: rgb(74, 160, 163, 255)}
-                               QTextEdit:hover{background-color: rgba(0,0,80,16)}""")
+        self.title_input.setObjectName("BoxTitle")
         layout.addWidget(self.title_input)
         layout.setContentsMargins(0,0,0,0)
 
-        self.text_input = QtWidgets.QTextEdit()
-        self.text_input.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
-        self.text_input.setText(text)
-        mh = self.text_input.document().size().height() + 20
-        self.text_input.setFixedHeight(mh + 20)
-        self.text_input.setAcceptDrops(False)
-        self.text_input.setContentsMargins(5,10,10,10)
-        self.text_input.setViewportMargins(10,10,10,10)
+        self.text_input = TextBlock(text=text, show_btn=False, parent=self)
+        self.text_input.setObjectName("BoxText")
+        self.text_input.setProperty("boxColor", color_str)
         layout.addWidget(self.text_input)
 
         self.main_layout.addLayout(layout)
 
         change_color_btn = QtWidgets.QToolButton()
-        change_color_btn.setStyleSheet("""QToolButton{background-color:
-                                          transparent;border: 0px}""")
+        change_color_btn.setObjectName("flatButton")
         change_color_btn.setIcon(get_icon("color"))
         change_color_btn.clicked.connect(self.change_color)
         self.main_layout.addWidget(change_color_btn)
@@ -895,18 +1149,10 @@ class TextBox(QtWidgets.QFrame, WidgetInterface):
         self.create_delete_btn()
         self.setLayout(self.main_layout)
 
-        self.apply_color()
-
     def apply_color(self):
-
-        color_str = ','.join([str(v) for v in [self.color.red(),
-                                               self.color.green(),
-                                               self.color.blue()]])
-
-        self.setStyleSheet("""QTextEdit{background-color: rgb(""" + color_str + """);
-                                     border: 1px solid black;
-                                     border-radius: 8px;
-                                     color: black}""")
+        """ Only the text input block is re-polished, see styles.set_variant().
+        """
+        styles.set_variant(self.text_input, "boxColor", self.color_str)
 
     def change_color(self):
 
@@ -915,9 +1161,9 @@ class TextBox(QtWidgets.QFrame, WidgetInterface):
         w.exec_()
         color = w.color
         if color:
-            self.color = getattr(BoxColors, color)
             self.color_str = color.lower()
-            self.apply_color() 
+            self.apply_color()
+            self.invalidate_output()
 
     def dropEvent(self, event):
         return WidgetInterface.dropEvent(self, event)
@@ -928,53 +1174,82 @@ class TextBox(QtWidgets.QFrame, WidgetInterface):
     def dragMoveEvent(self, event):
         return WidgetInterface.dragMoveEvent(self, event)
 
-    def keyReleaseEvent(self, event):
-
-        self.text_input.setFixedHeight(self.text_input.document().size().height() + 20)
-        super(TextBox, self).keyReleaseEvent(event)
-
     def data(self):
 
-        return {"type" : "TextBox",
-                text : self.text_input.toPlainText(),
-                color_str : self.color_str}
+        return model.TextBoxData(title=self.title_input.toPlainText(),
+                                 text=self.text_input.toPlainText(),
+                                 color=self.color_str)
 
     def output(self):
 
-        return '//TEXTBOX\n' + \
-               '\n:box:{}\n    #display: raised '.format(self.text_input.toPlainText()) + \
-               self.color_str + '\n    ' + \
-               self.text_input.toPlainText().replace('\n', ' ')
+        return self.data().serialize()
 
 class ImageFromDisk(QtWidgets.QWidget, WidgetInterface):
     """ Fetch a png image from disk and add it to the help card.
-        The file is embedded in the asset external file section with the
-        output() method is called. The link in the help card 
+        The file is embedded in the asset external file section by
+        write_sections() when the card is applied. The link in the help card 
         will point to this embedded file.
+        The section is named after the hash of the image content, so the
+        same image is stored only once per asset.
+        New images ( not read from the asset ) go through the images.ingest()
+        optimization pipeline first.
+        report is the images.IngestResult of img_data when it has already
+        been optimized ( pasted images ).
+        The data is kept in the shared assets.store, images read from an
+        asset are given as their section and only referenced ( under the
+        content hashed name, whatever the name of the section ). The pixmap
+        is dropped when the block is out of view, see set_in_view(), and
+        decoded again from the store ( by the images.Worker with
+        decode_async ) unless it is still in the images.cache.
     """
-    def __init__(self, img="", img_data=None, idx=0, parent=None):
+    def __init__(self, img="", img_data=None, optimize=None, decode_async=False,
+                 report=None, section=None, idx=0, parent=None):
         super(ImageFromDisk, self).__init__(parent=parent)
         WidgetInterface.__init__(self, idx, parent=parent)
         
         self.setAutoFillBackground(True)
         self.img_file = img
-        self.img_name = os.path.split(img)[1]
-        self.section_name = "HELP_CARD_IMG_" + self.img_name
+        self.node_type = ""
+
+        if optimize is None:
+            optimize = img_data is None and section is None
 
-        self.img_data = img_data
-        if not self.img_data:
+        data = img_data
+        if section is not None:
+            data = section.contents()
+        elif not data:
             with open(img, 'rb') as f: data = f.read()
-            self.img_data = data
 
-        pixmap = QtGui.QPixmap()
-        pixmap.loadFromData(self.img_data)
+        self.ingest_report = report
+        if optimize:
+            ext = os.path.splitext(img)[1].lower() or ".png"
+            self.ingest_report = images.ingest(data, ext)
+            data = self.ingest_report.data
+            img = os.path.splitext(img)[0] + self.ingest_report.ext
+            print("Image {}: {}".format(os.path.split(self.img_file)[1],
+                                        self.ingest_report))
+
+        # images of older cards get their content hashed name here, they
+        # are migrated on the next apply
+        self.img_name = assets.content_section_name(data, img)
+        self.section_name = model.IMAGE_SECTION_PREFIX + self.img_name
+
+        assets.store.add(self.section_name, data, section)
+        self.destroyed.connect(functools.partial(assets.store.discard,
+                                                 self.section_name))
 
         self.img = QtWidgets.QLabel("")
-        self.img.setFixedHeight(pixmap.height())
-        self.img.setFixedWidth(pixmap.width())
-        self.img.setPixmap(pixmap)
+        self.img.setObjectName("imageView")
+        self.img.setAlignment(QtCore.Qt.AlignCenter)
+        self.img.setFixedSize(images.image_size(data))
         self.main_layout.addWidget(self.img)
 
+        # images read from a card wait for the virtualizer to be in view
+        self.decode_key = None
+        self.in_view = not decode_async
+        if self.in_view:
+            self.load_pixmap(data, decode_async)
+
         self.create_delete_btn()
         self.setLayout(self.main_layout)
 
@@ -987,28 +1262,95 @@ class ImageFromDisk(QtWidgets.QWidget, WidgetInterface):
     def dragMoveEvent(self, event):
         return WidgetInterface.dragMoveEvent(self, event)
 
-    def _save_img_to_asset(self, definition):
-        """ Called when only output() is called, save the image data
-            to an HDA section to fetch the image from.
-        """ 
-        section = definition.sections().get(self.section_name)
-        if not section:
-            section= definition.addSection(self.section_name,
-                                           self.img_data)
+    @property
+    def img_data(self):
+
+        return assets.store.data(self.section_name)
+
+    def load_pixmap(self, data=None, decode_async=True):
+        """ Show the pixmap from the cache or decode it from the store.
+        """
+        pixmap = images.cache.get(self.section_name)
+        if pixmap is not None:
+            self.set_pixmap(pixmap)
+            return
+
+        if self.decode_key is not None:
+            return
+
+        if data is None:
+            data = self.img_data
+            if data is None:
+                self.img.setText("Image data not found")
+                return
+
+        if decode_async:
+            self.img.setText("Loading image...")
+            self.decode_key = images.worker().decode(data, self._decoded)
         else:
-            section.setContents(self.img_data)
+            pixmap = QtGui.QPixmap()
+            pixmap.loadFromData(data)
+            self._decoded(pixmap)
 
-    def output(self):
+    def _decoded(self, pixmap):
 
-        node = hou.selectedNodes()[0]
-        definition = node.type().definition()
+        self.decode_key = None
+        images.cache.put(self.section_name, pixmap)
+        if self.in_view:
+            self.set_pixmap(pixmap)
 
-        self._save_img_to_asset(definition)
+    def set_pixmap(self, pixmap):
 
-        tag = node.type().nameWithCategory() + "?"
+        self._thumbnail = None
+        self.img.setText("")
+        self.img.setFixedSize(pixmap.size())
+        self.img.setPixmap(pixmap)
+
+    def set_in_view(self, in_view):
+        """ Called by the virtualizer, the label keeps its pixmap only when
+            the block is near the viewport.
+        """
+        if in_view == self.in_view:
+            return
+        self.in_view = in_view
+
+        if in_view:
+            self.load_pixmap()
+            return
+
+        if self.decode_key is not None:
+            images.worker().cancel(self.decode_key)
+            self.decode_key = None
+        self.img.setPixmap(QtGui.QPixmap())
+        self.img.setText("")
+
+    def set_node_type(self, node_type):
+        """ Type of the asset the card is written to, used in the image link.
+        """
+        if node_type != self.node_type:
+            self.node_type = node_type
+            self.invalidate_output()
+
+    def write_sections(self, writer):
+        """ Stage the image data to an HDA section to fetch the image from.
+            No-op if a section with the same content hash already exists.
+        """ 
+        if self.section_name in writer.sections:
+            return
+
+        data = self.img_data
+        if data is None:
+            raise model.HelpCardError("Image data not found: " + self.section_name)
+        writer.stage(self.section_name, data)
+
+    def data(self):
+
+        return model.ImageData(section=self.section_name,
+                               node_type=self.node_type)
+
+    def output(self):
 
-        return "//IMG\n" + \
-               "[Image:opdef:/"+ tag + self.section_name + "]"
+        return self.data().serialize()
 
 class Vimeo(QtWidgets.QWidget, WidgetInterface):
 
@@ -1022,7 +1364,7 @@ class Vimeo(QtWidgets.QWidget, WidgetInterface):
 
         ico = QtWidgets.QLabel("")
         ico.setFixedSize(QtCore.QSize(32, 32))
-        pixmap = get_icon("vimeo").pixmap(32,32)
+        pixmap = get_pixmap("vimeo", 32, 32)
         ico.setPixmap(pixmap)
         self.main_layout.addWidget(ico)
 
@@ -1068,11 +1410,13 @@ class Vimeo(QtWidgets.QWidget, WidgetInterface):
     def dragMoveEvent(self, event):
         return WidgetInterface.dragMoveEvent(self, event)
 
+    def data(self):
+
+        return model.VimeoData(title=self.title, video_id=self.video_id)
+
     def output(self):
 
-        return "//VIMEO\n" + \
-                ":vimeo: {}\n    #id:{}".format(self.title,
-                                                self.video_id)
+        return self.data().serialize()
 
 class Code(QtWidgets.QWidget, WidgetInterface):
 
@@ -1088,18 +1432,25 @@ class Code(QtWidgets.QWidget, WidgetInterface):
 
         self.title = title
         self.title_input = TextBlock(text=title, show_btn=False, parent=self)
-        self.title_input.setStyleSheet("""QTextEdit{background-color: transparent;
-                                         border: 0px;
-                                         color: rgb(74, 160, 163, 255)}
-                               QTextEdit:hover{background-color: rgba(0,0,80,16)}""")
+        self.title_input.setObjectName("BoxTitle")
         layout.addWidget(self.title_input)
         layout.setContentsMargins(0,0,0,0)
 
-        self.code_input = TextBlock(text=text, show_btn=False, parent=self)
-        self.update_syntax(text)
-        self.code_input.text_changed_sgn.connect(self.update_syntax)
+        # the highlighter needs a live document, the editor is not lazy
+        self.code_input = TextBlock(text=text, show_btn=False, lazy=False,
+                                    parent=self)
+        self.code_input.editor.setAcceptRichText(False)
+        self.code_input.editor.setFont(QtGui.QFontDatabase.systemFont(
+                                       QtGui.QFontDatabase.FixedFont))
         layout.addWidget(self.code_input)        
 
+        # highlighted incrementally by Qt, only the edited lines are lexed
+        self.highlighter = None
+        if highlight.available():
+            self.highlighter = highlight.PygmentsHighlighter(
+                                    self.code_input.editor.document(),
+                                    language=language, parent=self)
+
         self.main_layout.addLayout(layout)
 
         self.change_language_btn = QtWidgets.QPushButton("")
@@ -1107,49 +1458,16 @@ class Code(QtWidgets.QWidget, WidgetInterface):
         self.change_language_btn.setFixedWidth(32)
         self.change_language_btn.setFlat(True)
         self.change_language_btn.setIconSize(QtCore.QSize(32, 32))
-        self.change_language_btn.setIcon(get_icon("python"))
+        if language == "python":
+            self.change_language_btn.setIcon(get_icon("python"))
+        else:
+            self.change_language_btn.setIcon(get_icon("c_plus_plus"))
         self.change_language_btn.clicked.connect(self.switch_language)
         self.main_layout.addWidget(self.change_language_btn)
 
         self.create_delete_btn()
         self.setLayout(self.main_layout)
 
-    def update_syntax(self, s):
-        
-        if not _highlight_available:
-            return
-
-        cur = self.code_input.text.textCursor()
-        cur_pos = cur.position()
-        text = self.code_input.text.toPlainText()
-        if len(text) > 1:
-            cur_char = text[cur_pos-1]
-        cur_char = ''
-
-        if cur_char == u'\n':
-            s += ' '
-        
-        tab_added = False
-        if cur_char == u'\t':
-            tab_added = True
-            s = s.replace('\t', '    ')
-        
-        if self.language == "python":
-            html_result = highlight(s, PythonLexer(), HtmlFormatter(full=True))
-        else:
-            html_result = highlight(s, CppLexer(), HtmlFormatter(full=True))
-            
-        self.code_input.text.blockSignals(True)
-        self.code_input.text.setHtml(html_result)
-        self.code_input.text.blockSignals(False)
-
-        if tab_added:
-            cur.setPosition(cur_pos + 3)
-        else:
-            cur.setPosition(cur_pos)
-
-        self.code_input.text.setTextCursor(cur)
-
     def switch_language(self):
 
         if self.language == "python":
@@ -1159,20 +1477,20 @@ class Code(QtWidgets.QWidget, WidgetInterface):
             self.change_language_btn.setIcon(get_icon("python"))
             self.language = "python"
 
-        self.update_syntax(self.code_input.text.toPlainText())
+        if self.highlighter:
+            self.highlighter.set_language(self.language)
+        self.invalidate_output()
 
-    def output(self):
-        
-        title = self.title_input.text.toPlainText()
-        if title.replace(' ', '') != '':
-            title = title.replace('\n', '')
-        else:
+    def data(self):
+
+        title = self.title_input.toPlainText()
+        if title.replace(' ', '') == '':
             title = ''
-        
-        language = self.language
-        code = self.code_input.text.toPlainText()
 
-        return "//CODE:" + language.upper() + \
-               "\n:box:" + title + "\n{{{\n#!" + language + "\n" + \
-               code + \
-               "\n}}}"
+        return model.CodeData(title=title,
+                              text=self.code_input.toPlainText(),
+                              language=self.language)
+
+    def output(self):
+
+        return self.data().serialize()
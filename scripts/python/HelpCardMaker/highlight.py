@@ -0,0 +1,176 @@
+""" Incremental syntax highlighting of the code snippets, based on pygments
+    lexers but applied per text block by a QSyntaxHighlighter: only the
+    edited lines are highlighted again.
+"""
+from PySide2 import QtGui
+from PySide2 import QtCore
+
+# pygments is only imported when the first code snippet is highlighted,
+# see available().
+_pygments = None
+
+# pasting more characters than this delays the highlighting until the
+# pasted text settled, the whole snippet is then highlighted once.
+PASTE_THRESHOLD = 2000
+PASTE_DELAY = 200
+
+# multi-lines delimiters per language: (opening, closing, token type name)
+MULTILINE = {"python": [('"""', '"""', "String"), ("'''", "'''", "String")],
+             "cpp": [("/*", "*/", "Comment")]}
+
+def available():
+    """ Import pygments on first call, return False if it is not installed.
+    """
+    global _pygments
+    if _pygments is None:
+        try:
+            from pygments import lexers, styles, token
+            _pygments = {"lexers": lexers, "styles": styles, "token": token}
+        except ImportError:
+            _pygments = {}
+
+    return bool(_pygments)
+
+class PygmentsHighlighter(QtGui.QSyntaxHighlighter):
+    """ Lexers and char formats are created once and shared by all the
+        highlighters. Multi-lines strings / comments are tracked with the
+        block state: 0 outside, n + 1 inside the nth MULTILINE delimiter.
+    """
+    _lexers = {}
+    _formats = {}
+    _style = None
+
+    def __init__(self, document, language="python", parent=None):
+        super(PygmentsHighlighter, self).__init__(parent)
+
+        self.language = language
+        self.lexer = self.get_lexer(language)
+        self._deferred = False
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(PASTE_DELAY)
+        self._timer.timeout.connect(self._highlight_deferred)
+
+        # connected before setDocument() to be called before the
+        # highlighter's own contentsChange slot.
+        document.contentsChange.connect(self._contents_changed)
+        self.setDocument(document)
+
+    @classmethod
+    def get_lexer(cls, language):
+
+        lexer = cls._lexers.get(language)
+        if lexer is None:
+            lexers = _pygments["lexers"]
+            lexer_cls = lexers.PythonLexer if language == "python" \
+                        else lexers.CppLexer
+            lexer = lexer_cls(stripnl=False, ensurenl=False)
+            cls._lexers[language] = lexer
+        return lexer
+
+    @classmethod
+    def get_format(cls, ttype):
+
+        fmt = cls._formats.get(ttype, False)
+        if fmt is not False:
+            return fmt
+
+        if cls._style is None:
+            cls._style = _pygments["styles"].get_style_by_name("default")
+
+        fmt = None
+        t = ttype
+        while t is not None:
+            if cls._style.styles_token(t):
+                style = cls._style.style_for_token(t)
+                if not (style["color"] or style["bold"] or style["italic"]):
+                    break
+                fmt = QtGui.QTextCharFormat()
+                if style["color"]:
+                    fmt.setForeground(QtGui.QColor("#" + style["color"]))
+                if style["bold"]:
+                    fmt.setFontWeight(QtGui.QFont.Bold)
+                if style["italic"]:
+                    fmt.setFontItalic(True)
+                break
+            t = t.parent
+
+        cls._formats[ttype] = fmt
+        return fmt
+
+    def set_language(self, language):
+
+        self.language = language
+        self.lexer = self.get_lexer(language)
+        self.rehighlight()
+
+    def _contents_changed(self, position, removed, added):
+
+        if added >= PASTE_THRESHOLD:
+            self._deferred = True
+            self._timer.start()
+
+    def _highlight_deferred(self):
+
+        self._deferred = False
+        self.rehighlight()
+
+    def _token_format(self, name):
+
+        return self.get_format(getattr(_pygments["token"], name))
+
+    def highlightBlock(self, text):
+
+        if self._deferred:
+            self.setCurrentBlockState(self.previousBlockState())
+            return
+
+        delimiters = MULTILINE.get(self.language, [])
+        start = 0
+
+        # continuation of a multi-lines string / comment
+        state = self.previousBlockState()
+        if 0 < state <= len(delimiters):
+            _, closing, name = delimiters[state - 1]
+            end = text.find(closing)
+            fmt = self._token_format(name)
+            if end == -1:
+                self.setFormat(0, len(text), fmt)
+                self.setCurrentBlockState(state)
+                return
+            start = end + len(closing)
+            self.setFormat(0, start, fmt)
+
+        self.setCurrentBlockState(0)
+
+        # lexed with its line break, single line comments need it.
+        # tokens maps the start of each token to (type, value)
+        tokens = {}
+        pos = start
+        for ttype, value in self.lexer.get_tokens(text[start:] + '\n'):
+            tokens[pos] = (ttype, value)
+            fmt = self.get_format(ttype)
+            length = min(len(value), len(text) - pos)
+            if fmt is not None and length > 0:
+                self.setFormat(pos, length, fmt)
+            pos += len(value)
+
+        # multi-lines string / comment opened but not closed on this line,
+        # only the delimiters starting a token of the delimiter type are
+        # taken, not the ones inside a comment or a single line string.
+        for i, (opening, closing, name) in enumerate(delimiters):
+            ttype = getattr(_pygments["token"], name)
+            idx = text.find(opening, start)
+            while idx != -1:
+                token = tokens.get(idx)
+                if token is None or token[0] not in ttype or \
+                   not token[1].startswith(opening):
+                    idx = text.find(opening, idx + 1)
+                    continue
+                end = text.find(closing, idx + len(opening))
+                if end == -1:
+                    self.setFormat(idx, len(text) - idx, self._token_format(name))
+                    self.setCurrentBlockState(i + 1)
+                    return
+                idx = text.find(opening, end + len(closing))
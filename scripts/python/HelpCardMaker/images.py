@@ -0,0 +1,393 @@
+""" Image ingest pipeline, run on the images added to a help card before
+    they are embedded in the asset: downscale, re-compress / quantize,
+    optional jpeg output for photos and metadata stripping.
+    Images read from a card and pasted images are decoded / encoded on a
+    thread pool by the Worker. The image data is kept in the shared
+    assets.store and the decoded pixmaps in a memory bounded cache.
+"""
+import os
+import re
+import time
+import tempfile
+from collections import OrderedDict
+
+from PySide2 import QtGui
+from PySide2 import QtCore
+
+def _env_int(name, default):
+
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+class IngestSettings(object):
+    """ Image ingest settings, the defaults can be overridden with the
+        HELPCARDMAKER_IMG_* environment variables.
+    """
+    def __init__(self, max_size=1600, png_quantize=False, jpeg_photos=False,
+                 jpeg_quality=85, photo_ratio=0.5, strip_metadata=True):
+
+        # max width / height in pixels, 0 to keep the original size
+        self.max_size = max_size
+        # reduce the png to a 256 colors palette ( lossy )
+        self.png_quantize = png_quantize
+        # save images without alpha as jpeg when the jpeg is smaller than
+        # photo_ratio * png size
+        self.jpeg_photos = jpeg_photos
+        self.jpeg_quality = jpeg_quality
+        self.photo_ratio = photo_ratio
+        self.strip_metadata = strip_metadata
+
+    @classmethod
+    def from_env(cls):
+
+        return cls(max_size=_env_int("HELPCARDMAKER_IMG_MAX_SIZE", 1600),
+                   png_quantize=bool(_env_int("HELPCARDMAKER_IMG_QUANTIZE", 0)),
+                   jpeg_photos=bool(_env_int("HELPCARDMAKER_IMG_JPEG", 0)),
+                   jpeg_quality=_env_int("HELPCARDMAKER_IMG_JPEG_QUALITY", 85),
+                   strip_metadata=bool(_env_int("HELPCARDMAKER_IMG_STRIP", 1)))
+
+settings = IngestSettings.from_env()
+
+class IngestResult(object):
+    """ Output of ingest(): the data to embed, its file extension and the
+        sizes in bytes before / after.
+    """
+    def __init__(self, data, ext, original_size):
+
+        self.data = data
+        self.ext = ext
+        self.original_size = original_size
+        self.size = len(data)
+
+    @property
+    def saved(self):
+
+        return self.original_size - self.size
+
+    def __str__(self):
+
+        ratio = 0.0
+        if self.original_size:
+            ratio = 100.0 * self.saved / self.original_size
+        return "{} -> {} ({} saved, {:.0f}%)".format(format_size(self.original_size),
+                                                    format_size(self.size),
+                                                    format_size(self.saved),
+                                                    ratio)
+
+def format_size(n):
+
+    if abs(n) < 1024:
+        return "{} B".format(n)
+    if abs(n) < 1024 * 1024:
+        return "{:.1f} KB".format(n / 1024.0)
+    return "{:.1f} MB".format(n / (1024.0 * 1024.0))
+
+def encode(image, fmt="PNG", quality=-1):
+    """ Encode a QImage to bytes in memory.
+    """
+    data = QtCore.QByteArray()
+    buffer = QtCore.QBuffer(data)
+    buffer.open(QtCore.QIODevice.WriteOnly)
+    image.save(buffer, fmt, quality)
+    buffer.close()
+    return bytes(data.data())
+
+def _without_metadata(image):
+    """ Copy of the image pixels only, text keys are not copied.
+    """
+    fmt = QtGui.QImage.Format_ARGB32
+    if not image.hasAlphaChannel():
+        fmt = QtGui.QImage.Format_RGB32
+
+    out = QtGui.QImage(image.size(), fmt)
+    out.fill(QtCore.Qt.transparent)
+    painter = QtGui.QPainter(out)
+    painter.drawImage(0, 0, image)
+    painter.end()
+    return out
+
+def ingest(data, ext=".png", settings=settings):
+    """ Run the ingest pipeline on raw image bytes, return an IngestResult.
+        The original data is kept when the pipeline can't make it smaller
+        and no resize was needed.
+    """
+    original = IngestResult(data, ext, len(data))
+
+    image = QtGui.QImage()
+    if not image.loadFromData(data):
+        return original
+
+    resized = False
+    stripped = False
+    if settings.max_size and max(image.width(), image.height()) > settings.max_size:
+        image = image.scaled(settings.max_size, settings.max_size,
+                             QtCore.Qt.KeepAspectRatio,
+                             QtCore.Qt.SmoothTransformation)
+        resized = True
+
+    if settings.strip_metadata and image.textKeys():
+        image = _without_metadata(image)
+        stripped = True
+
+    if settings.png_quantize:
+        image = image.convertToFormat(QtGui.QImage.Format_Indexed8,
+                                      QtCore.Qt.DiffuseDither)
+
+    # quality 0 is the highest png compression level
+    result = IngestResult(encode(image, "PNG", 0), ".png", len(data))
+
+    if settings.jpeg_photos and not image.hasAlphaChannel():
+        jpg = encode(image, "JPG", settings.jpeg_quality)
+        if len(jpg) < result.size * settings.photo_ratio:
+            result = IngestResult(jpg, ".jpg", len(data))
+
+    if result.size >= original.size and not (resized or stripped):
+        return original
+
+    return result
+
+def image_size(data):
+    """ Size of an encoded image read from its header only, the pixels are
+        not decoded.
+    """
+    array = QtCore.QByteArray(data)
+    buffer = QtCore.QBuffer(array)
+    buffer.open(QtCore.QIODevice.ReadOnly)
+    size = QtGui.QImageReader(buffer).size()
+    buffer.close()
+    return size
+
+class _TaskSignals(QtCore.QObject):
+
+    done = QtCore.Signal(object, object)
+
+class _Task(QtCore.QRunnable):
+
+    def __init__(self, key, func, args, signals):
+        super(_Task, self).__init__()
+
+        self.key = key
+        self.func = func
+        self.args = args
+        self.signals = signals
+
+    def run(self):
+
+        try:
+            result = self.func(*self.args)
+        except Exception as e:
+            result = e
+        self.signals.done.emit(self.key, result)
+
+def _decode(data):
+
+    image = QtGui.QImage()
+    image.loadFromData(data)
+    return image
+
+def _ingest_image(image, name, settings):
+
+    data = encode(image)
+    return ingest(data, os.path.splitext(name)[1] or ".png", settings)
+
+class Worker(object):
+    """ Run the image decoding / encoding on a thread pool, the callbacks
+        are called on the main thread with the result. QImage is safe to
+        use from any thread, QPixmap is only created on the main thread.
+    """
+    def __init__(self, pool=None):
+
+        self.pool = pool or QtCore.QThreadPool.globalInstance()
+        # created on the main thread, the signal is queued to it
+        self.signals = _TaskSignals()
+        self.signals.done.connect(self._done)
+        self._callbacks = {}
+        self._next_key = 0
+
+    def submit(self, func, args, callback):
+        """ Call func(*args) on the pool then callback(result), return a key
+            to cancel the callback.
+        """
+        key = self._next_key
+        self._next_key += 1
+        self._callbacks[key] = callback
+        self.pool.start(_Task(key, func, args, self.signals))
+        return key
+
+    def decode(self, data, callback):
+        """ Decode image bytes, callback gets the QPixmap.
+        """
+        return self.submit(_decode, (data,),
+                           lambda image: callback(QtGui.QPixmap.fromImage(image)))
+
+    def ingest(self, image, name, callback, settings=settings):
+        """ Encode a QImage in memory and run the ingest pipeline on it,
+            callback gets the IngestResult.
+        """
+        return self.submit(_ingest_image, (image, name, settings), callback)
+
+    def cancel(self, key):
+
+        self._callbacks.pop(key, None)
+
+    def pending(self):
+
+        return len(self._callbacks)
+
+    def _done(self, key, result):
+
+        callback = self._callbacks.pop(key, None)
+        if callback is None:
+            return
+        if isinstance(result, Exception):
+            print("Image error: " + str(result))
+            return
+        try:
+            callback(result)
+        except RuntimeError:
+            # the widget waiting for the image has been deleted
+            pass
+
+def _pixmap_cost(pixmap):
+
+    return pixmap.width() * pixmap.height() * max(1, pixmap.depth()) // 8
+
+class PixmapCache(object):
+    """ Least recently used cache of the decoded pixmaps, bounded by a
+        memory budget in bytes. Evicted pixmaps are decoded again from the
+        assets.ImageStore when needed.
+    """
+    def __init__(self, budget):
+
+        self.budget = budget
+        self.used = 0
+        self._pixmaps = OrderedDict()
+
+    def __len__(self):
+
+        return len(self._pixmaps)
+
+    def get(self, name):
+
+        pixmap = self._pixmaps.pop(name, None)
+        if pixmap is not None:
+            self._pixmaps[name] = pixmap
+        return pixmap
+
+    def put(self, name, pixmap):
+
+        self.remove(name)
+        self._pixmaps[name] = pixmap
+        self.used += _pixmap_cost(pixmap)
+        self.evict()
+
+    def remove(self, name):
+
+        pixmap = self._pixmaps.pop(name, None)
+        if pixmap is not None:
+            self.used -= _pixmap_cost(pixmap)
+
+    def evict(self):
+
+        while self.used > self.budget and self._pixmaps:
+            name, pixmap = self._pixmaps.popitem(last=False)
+            self.used -= _pixmap_cost(pixmap)
+
+    def set_budget(self, budget):
+
+        self.budget = budget
+        self.evict()
+
+    def clear(self):
+
+        self._pixmaps.clear()
+        self.used = 0
+
+    def usage(self):
+
+        return "{} / {} ({} image(s))".format(format_size(self.used),
+                                              format_size(self.budget),
+                                              len(self._pixmaps))
+
+# pixmaps memory budget, in MB
+cache = PixmapCache(_env_int("HELPCARDMAKER_IMG_CACHE_MB", 256) * 1024 * 1024)
+
+_worker = None
+
+def worker():
+    """ Shared Worker, created on first use once the QApplication exists.
+    """
+    global _worker
+    if _worker is None:
+        _worker = Worker()
+    return _worker
+
+# file names of the clipboard images saved to the temp folder by the
+# previous versions: uuid4().hex + ".png"
+_CLIPBOARD_FILE = re.compile(r"^[0-9a-f]{12}4[0-9a-f]{3}[89ab][0-9a-f]{15}\.png$")
+
+# the files more recent than this ( in seconds ) are kept, they may belong
+# to another application or to a session still running an older version
+CLIPBOARD_FILE_AGE = 7 * 24 * 3600
+
+# written in the temp folder once the clipboard images have been cleaned
+CLEANED_MARKER = "helpcardmaker_clipboard_cleaned"
+
+# folders already cleaned in this session
+_cleaned_folders = set()
+
+def clean_clipboard_files(folder=None, older_than=None):
+    """ Delete the clipboard images left in the temp folder by the previous
+        versions, modified before older_than ( CLIPBOARD_FILE_AGE ago by
+        default ). Return the number of files deleted and kept.
+    """
+    folder = folder or tempfile.gettempdir()
+    if older_than is None:
+        older_than = time.time() - CLIPBOARD_FILE_AGE
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return 0, 0
+
+    deleted = 0
+    kept = 0
+    for name in names:
+        if not _CLIPBOARD_FILE.match(name):
+            continue
+        path = os.path.join(folder, name)
+        try:
+            if os.path.getmtime(path) >= older_than:
+                kept += 1
+                continue
+            os.remove(path)
+            deleted += 1
+        except OSError:
+            kept += 1
+    return deleted, kept
+
+def clean_clipboard_files_once(folder=None):
+    """ Run clean_clipboard_files() once per session until no clipboard
+        image is left in the temp folder, a marker file is then written to
+        skip it. Return the number of files deleted.
+    """
+    folder = folder or tempfile.gettempdir()
+    if folder in _cleaned_folders:
+        return 0
+    _cleaned_folders.add(folder)
+
+    marker = os.path.join(folder, CLEANED_MARKER)
+    if os.path.exists(marker):
+        return 0
+
+    deleted, kept = clean_clipboard_files(folder)
+    if kept:
+        return deleted
+
+    try:
+        with open(marker, 'w') as f:
+            f.write("clipboard images cleaned\n")
+    except (IOError, OSError):
+        pass
+    return deleted
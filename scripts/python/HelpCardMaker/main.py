@@ -1,5 +1,47 @@
-from HelpCardMaker import ui
-reload(ui)
+import os
+import sys
+import time
+
+# set HELPCARDMAKER_DEV=1 to reload all the modules each time a new
+# panel is created, only useful while developing the tool.
+DEV_MODE = os.environ.get("HELPCARDMAKER_DEV", "0") not in ("", "0")
+
+# reload order, dependencies first.
+MODULES = ["utils", "styles", "model", "assets", "parms", "images", "highlight",
+           "core", "virtual", "help_widgets", "ui"]
+
+_start_count = 0
+
+def reload_modules():
+    """ Reload all the HelpCardMaker modules already imported.
+    """
+    try:
+        _reload = reload
+    except NameError:
+        from importlib import reload as _reload
+
+    for name in MODULES:
+        module = sys.modules.get("HelpCardMaker." + name)
+        if module:
+            _reload(module)
 
 def init_panel():
-    return ui.MainPanel()
\ No newline at end of file
+
+    global _start_count
+    start = time.time()
+
+    if DEV_MODE:
+        reload_modules()
+
+    from HelpCardMaker import ui
+    from HelpCardMaker import utils
+    panel = ui.MainPanel()
+
+    elapsed = time.time() - start
+    kind = "warm" if _start_count else "cold"
+    _start_count += 1
+    panel.startup_time = elapsed
+    print("Help Card Maker: {} start in {:.3f}s, {}".format(
+          kind, elapsed, utils.icon_cache.stats()))
+
+    return panel
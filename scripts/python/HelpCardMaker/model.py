@@ -0,0 +1,681 @@
+""" Plain python help card document model.
+
+    This module must not import hou or PySide2: it is used to parse,
+    serialize and validate help cards outside of any GUI session.
+    The help widgets are views over these blocks, see the data()
+    method of each widget.
+"""
+from collections import OrderedDict
+
+HEADER = "//HELP CARD MAKER"
+FOOTER = "//END"
+NO_FOLDER = "_NO_FOLDER_"
+INDENT = "    "
+
+IMAGE_SECTION_PREFIX = "HELP_CARD_IMG_"
+ICON_SECTION_PREFIX = "HELP_CARD_ICO_"
+
+BOX_COLORS = ["red", "green", "blue", "orange", "gray", "pink",
+              "yellow", "purple", "magenta", "teal", "seafoam", "white"]
+
+CODE_LANGUAGES = ["python", "cpp"]
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+class HelpCardError(Exception):
+    pass
+
+def _indent(text):
+
+    return text.replace('\n', '\n' + INDENT)
+
+def _dedent(lines):
+
+    return '\n'.join([l[len(INDENT):] if l.startswith(INDENT) else l \
+                      for l in lines])
+
+def _strip_empty(lines):
+    """ Remove the leading and trailing empty lines of a cluster.
+    """
+    lines = list(lines)
+    while lines and not lines[0].strip():
+        lines.pop(0)
+    while lines and not lines[-1].strip():
+        lines.pop()
+    return lines
+
+class Block(object):
+    """ Base class of every help card block. A block is serialized as a
+        "//TAG" cluster header followed by its body lines.
+    """
+    tag = None
+    fields = ()
+
+    def __init__(self, **kwargs):
+
+        for f in self.fields:
+            setattr(self, f, kwargs.pop(f, getattr(self, f, None)))
+
+        if kwargs:
+            raise TypeError("Unknown field(s) for {}: {}".format(
+                            self.__class__.__name__, ', '.join(kwargs)))
+
+    def __eq__(self, other):
+
+        return type(self) is type(other) and \
+               all(getattr(self, f) == getattr(other, f) for f in self.fields)
+
+    def __ne__(self, other):
+
+        return not self == other
+
+    def __repr__(self):
+
+        return "{}({})".format(self.__class__.__name__,
+                               ', '.join("{}={!r}".format(f, getattr(self, f)) \
+                                         for f in self.fields))
+
+    def cluster_tag(self):
+
+        return self.tag
+
+    def body(self):
+        """ Wiki formatted body of the block, without the cluster header.
+        """
+        raise NotImplementedError
+
+    def serialize(self):
+
+        return "//" + self.cluster_tag() + '\n' + self.body()
+
+    def validate(self):
+        """ Return a list of human readable error messages, empty if the
+            block is valid.
+        """
+        return []
+
+    def sections(self):
+        """ Names of the asset sections referenced by the block.
+        """
+        return []
+
+    @classmethod
+    def parse(cls, tag, lines):
+        """ Create a block from the cluster tag and its body lines.
+        """
+        raise NotImplementedError
+
+class MainTitleData(Block):
+
+    tag = "MAINTITLE"
+    fields = ("text", "context", "node_type", "icon_section")
+
+    text = ""
+    context = ""
+    node_type = ""
+    icon_section = ""
+
+    def body(self):
+
+        out = '= ' + self.text + ' =\n'
+        out += "#type: node\n#context: " + self.context + '\n'
+        out += "#icon: opdef:" + self.node_type + "?" + self.icon_section
+        return out
+
+    def sections(self):
+
+        return [self.icon_section] if self.icon_section else []
+
+    def validate(self):
+
+        errors = []
+        if not self.text.strip():
+            errors.append("Main title is empty")
+        if not self.icon_section:
+            errors.append("Main title has no icon section")
+        return errors
+
+    @classmethod
+    def parse(cls, tag, lines):
+
+        lines = _strip_empty(lines)
+        if not lines:
+            raise HelpCardError("Main title cluster is empty")
+
+        text = lines[0].strip()
+        if text.startswith('= '): text = text[2:]
+        if text.endswith(' ='): text = text[:-2]
+
+        infos = {}
+        for l in lines[1:]:
+            if l.startswith('#') and ':' in l:
+                k, v = l[1:].split(':', 1)
+                infos[k.strip()] = v.strip()
+
+        node_type = ""
+        icon_section = ""
+        icon = infos.get("icon", "")
+        if icon.startswith("opdef:") and '?' in icon:
+            node_type, icon_section = icon[len("opdef:"):].split('?', 1)
+
+        return cls(text=text, context=infos.get("context", ""),
+                   node_type=node_type, icon_section=icon_section)
+
+class TitleData(Block):
+    """ Section title, or navigation menu entry when entry_menu is True.
+    """
+    tag = "TITLE"
+    fields = ("text", "entry_menu")
+
+    text = ""
+    entry_menu = False
+
+    def cluster_tag(self):
+
+        if self.entry_menu:
+            return "TITLEENTIRYMENU"
+        return self.tag
+
+    def body(self):
+
+        if self.entry_menu:
+            return '@' + self.text.replace(' ', '') + ' ' + self.text
+
+        return '== ' + self.text + '  =='
+
+    @classmethod
+    def parse(cls, tag, lines):
+
+        lines = _strip_empty(lines)
+        line = lines[0] if lines else ""
+
+        if tag == "TITLEENTIRYMENU":
+            return cls(text=line.split(' ', 1)[-1].strip(), entry_menu=True)
+
+        text = line.strip()
+        if text.startswith('=='): text = text[2:]
+        if text.endswith('=='): text = text[:-2]
+        return cls(text=text.strip(), entry_menu=False)
+
+class TextBlockData(Block):
+
+    tag = "TEXTBLOCK"
+    fields = ("text",)
+
+    text = ""
+
+    def body(self):
+
+        return self.text
+
+    @classmethod
+    def parse(cls, tag, lines):
+
+        return cls(text='\n'.join(_strip_empty(lines)))
+
+class CalloutData(Block):
+    """ Tip, note or warning line, the kind is the cluster tag.
+    """
+    tag = "TIP"
+    fields = ("kind", "text", "display")
+
+    KINDS = OrderedDict([("TIP", "yellow"),
+                         ("NOTE", "blue"),
+                         ("WARNING", "red")])
+
+    kind = "TIP"
+    text = ""
+    display = None
+
+    def __init__(self, **kwargs):
+        super(CalloutData, self).__init__(**kwargs)
+
+        if not self.display:
+            self.display = self.KINDS.get(self.kind, "yellow")
+
+    def cluster_tag(self):
+
+        return self.kind
+
+    def body(self):
+
+        return self.kind + ":\n" + INDENT + "#display: " + self.display + \
+               '\n' + INDENT + _indent(self.text)
+
+    def validate(self):
+
+        if self.kind not in self.KINDS:
+            return ["Unknown callout type: " + str(self.kind)]
+        return []
+
+    @classmethod
+    def parse(cls, tag, lines):
+
+        display = None
+        text_lines = []
+        for l in _strip_empty(lines):
+            if l.rstrip() == tag + ':':
+                continue
+            if l.strip().startswith("#display:"):
+                display = l.split(':', 1)[-1].strip()
+                continue
+            text_lines.append(l)
+
+        return cls(kind=tag, text=_dedent(text_lines), display=display)
+
+class SeparatorData(Block):
+
+    tag = "SEPARATOR"
+
+    def body(self):
+
+        return "~~~"
+
+    @classmethod
+    def parse(cls, tag, lines):
+
+        return cls()
+
+class BulletsData(Block):
+
+    tag = "BULLETS"
+    fields = ("items", "numbered")
+
+    numbered = False
+
+    def __init__(self, **kwargs):
+        super(BulletsData, self).__init__(**kwargs)
+
+        self.items = list(self.items or [])
+
+    def body(self):
+
+        prefix = '# ' if self.numbered else '* '
+        return '\n'.join([prefix + i.replace('\n', ' ') for i in self.items])
+
+    def validate(self):
+
+        if not self.items:
+            return ["Bullet list is empty"]
+        return []
+
+    @classmethod
+    def parse(cls, tag, lines):
+
+        numbered = False
+        items = []
+        for l in _strip_empty(lines):
+            if l.startswith("* "):
+                items.append(l[2:])
+            elif l.startswith("# "):
+                items.append(l[2:])
+                numbered = True
+            elif l.strip():
+                items.append(l)
+
+        return cls(items=items, numbered=numbered)
+
+class TextBoxData(Block):
+
+    tag = "TEXTBOX"
+    fields = ("title", "text", "color")
+
+    title = ""
+    text = ""
+    color = "blue"
+
+    def body(self):
+
+        return '\n:box:' + self.title.replace('\n', '') + '\n' + INDENT + '#display: raised ' + \
+               self.color + '\n' + INDENT + self.text.replace('\n', ' ')
+
+    def validate(self):
+
+        if self.color not in BOX_COLORS:
+            return ["Unknown box color: " + str(self.color)]
+        return []
+
+    @classmethod
+    def parse(cls, tag, lines):
+
+        lines = _strip_empty(lines)
+        if len(lines) < 2:
+            raise HelpCardError("Invalid text box cluster")
+
+        title = lines[0].split(':box:')[-1]
+        color = lines[1].split(' ')[-1].strip()
+        return cls(title=title, text=_dedent(lines[2:]), color=color)
+
+class VimeoData(Block):
+
+    tag = "VIMEO"
+    fields = ("title", "video_id")
+
+    title = ""
+    video_id = ""
+
+    def body(self):
+
+        return ":vimeo: {}\n    #id:{}".format(self.title, self.video_id)
+
+    def validate(self):
+
+        if not self.video_id.strip().isdigit():
+            return ["Invalid vimeo video id: " + str(self.video_id)]
+        return []
+
+    @classmethod
+    def parse(cls, tag, lines):
+
+        lines = _strip_empty(lines)
+        if len(lines) < 2:
+            raise HelpCardError("Invalid vimeo cluster")
+
+        return cls(title=lines[0].replace(":vimeo: ", ''),
+                   video_id=lines[1].split(':')[-1].strip())
+
+class CodeData(Block):
+
+    tag = "CODE"
+    fields = ("title", "text", "language")
+
+    title = ""
+    text = ""
+    language = "python"
+
+    def cluster_tag(self):
+
+        return self.tag + ':' + self.language.upper()
+
+    def body(self):
+
+        return ":box:" + self.title.replace('\n', '') + "\n{{{\n#!" + \
+               self.language + "\n" + self.text + "\n}}}"
+
+    def validate(self):
+
+        if self.language not in CODE_LANGUAGES:
+            return ["Unknown code language: " + str(self.language)]
+        return []
+
+    @classmethod
+    def parse(cls, tag, lines):
+
+        lines = _strip_empty(lines)
+        if len(lines) < 4:
+            raise HelpCardError("Invalid data for cluster CODE")
+
+        title = lines[0].split(":box:")[-1]
+        language = tag.split(':')[-1].lower()
+        return cls(title=title, text='\n'.join(lines[3:-1]),
+                   language=language)
+
+class ImageData(Block):
+    """ Link to an image embedded in the asset's HELP_CARD_IMG_ section.
+    """
+    tag = "IMG"
+    fields = ("section", "node_type")
+
+    section = ""
+    node_type = ""
+
+    def body(self):
+
+        return "[Image:opdef:/" + self.node_type + "?" + self.section + "]"
+
+    def sections(self):
+
+        return [self.section]
+
+    def validate(self):
+
+        if not self.section.startswith(IMAGE_SECTION_PREFIX):
+            return ["Invalid image section name: " + str(self.section)]
+        return []
+
+    @classmethod
+    def parse(cls, tag, lines):
+
+        lines = _strip_empty(lines)
+        if not lines or '?' not in lines[0]:
+            raise HelpCardError("Invalid image cluster")
+
+        link, section = lines[0].strip().rsplit('?', 1)
+        node_type = link.replace("[Image:opdef:/", '')
+        return cls(section=section.replace(']', ''), node_type=node_type)
+
+class ParametersData(Block):
+    """ Parameters grid, folders is an ordered dict of folder label to
+        a list of [parm label, parm help], parameters outside of any folder
+        are stored with the NO_FOLDER key.
+    """
+    tag = "PARAMETERS"
+    fields = ("folders",)
+
+    def __init__(self, **kwargs):
+        super(ParametersData, self).__init__(**kwargs)
+
+        folders = OrderedDict()
+        folders[NO_FOLDER] = []
+        for k, v in (self.folders or {}).items():
+            folders[k] = [list(p) for p in v]
+        self.folders = folders
+
+    def body(self):
+
+        out = []
+        for k, parms in self.folders.items():
+            if k != NO_FOLDER:
+                out.append('\n' + k + '\n')
+            for label, help in parms:
+                out.append(label + ':\n' + INDENT + _indent(help))
+
+        return "@parameters\n" + '\n'.join(out)
+
+    @classmethod
+    def parse(cls, tag, lines):
+
+        folders = OrderedDict()
+        folders[NO_FOLDER] = []
+        cur_folder = NO_FOLDER
+        # indented lines are kept even when blank, they are the help of a
+        # parameter whose help is empty
+        lines = [l for l in lines if (l.startswith(INDENT) or l.strip()) \
+                 and l != "@parameters"]
+
+        i = 0
+        while i < len(lines):
+            l = lines[i]
+            if l.startswith(INDENT):
+                i += 1
+                continue
+
+            help_lines = []
+            j = i + 1
+            while j < len(lines) and lines[j].startswith(INDENT):
+                help_lines.append(lines[j])
+                j += 1
+
+            if l.endswith(':') and help_lines:
+                folders[cur_folder].append([l[:-1], _dedent(help_lines)])
+            else:
+                cur_folder = l
+                folders.setdefault(cur_folder, [])
+            i = j
+
+        return cls(folders=folders)
+
+BLOCK_TYPES = OrderedDict()
+for _cls in [MainTitleData, TitleData, TextBlockData, CalloutData,
+             SeparatorData, BulletsData, TextBoxData, VimeoData,
+             CodeData, ImageData, ParametersData]:
+    BLOCK_TYPES[_cls.tag] = _cls
+
+BLOCK_TYPES["TITLEENTIRYMENU"] = TitleData
+BLOCK_TYPES["NOTE"] = CalloutData
+BLOCK_TYPES["WARNING"] = CalloutData
+BLOCK_TYPES["CODE:PYTHON"] = CodeData
+BLOCK_TYPES["CODE:CPP"] = CodeData
+
+def parse_block(tag, lines):
+    """ Create the block matching the given cluster tag.
+    """
+    cls = BLOCK_TYPES.get(tag)
+    if not cls:
+        raise HelpCardError("Unknown cluster: " + tag)
+    return cls.parse(tag, lines)
+
+class BlockRecord(object):
+    """ A parsed cluster as yielded by iter_blocks(): the cluster tag, the
+        line number (1-based) of its "//TAG" header, and either the block
+        or the error message when the cluster could not be parsed.
+    """
+    __slots__ = ("tag", "line", "block", "error")
+
+    def __init__(self, tag, line, block=None, error=None):
+
+        self.tag = tag
+        self.line = line
+        self.block = block
+        self.error = error
+
+    def __repr__(self):
+
+        return "BlockRecord({!r}, line={}, error={!r})".format(self.tag,
+                                                              self.line,
+                                                              self.error)
+
+def iter_lines(text):
+    """ Yield the lines of a string without building the whole list,
+        file objects or any iterable of lines can be given as well.
+    """
+    if not isinstance(text, basestring):
+        for l in text:
+            yield l.rstrip('\r\n')
+        return
+
+    start = 0
+    end = text.find('\n')
+    while end != -1:
+        yield text[start:end].rstrip('\r')
+        start = end + 1
+        end = text.find('\n', start)
+    yield text[start:]
+
+def iter_clusters(lines):
+    """ Single pass tokenizer, yield (tag, line number, body lines) for each
+        "//TAG" cluster, the first line must be the help card header.
+    """
+    tag = None
+    start = 0
+    body = []
+
+    for i, l in enumerate(lines):
+
+        if i == 0:
+            if not l.startswith(HEADER):
+                raise HelpCardError("Help card was not created by help card maker")
+            continue
+
+        if l.startswith('//'):
+            if tag is not None:
+                yield tag, start, body
+            if l.startswith(FOOTER):
+                return
+            tag = l[2:].strip()
+            start = i + 1
+            body = []
+        elif tag is not None:
+            body.append(l)
+
+    if tag is not None:
+        yield tag, start, body
+
+def iter_blocks(text):
+    """ Parse a help card in one linear pass, yield a BlockRecord per
+        cluster. A cluster which can't be parsed yields a record with
+        an error message instead of interrupting the parsing.
+    """
+    for tag, line, body in iter_clusters(iter_lines(text)):
+        try:
+            yield BlockRecord(tag, line, block=parse_block(tag, body))
+        except (HelpCardError, IndexError, ValueError) as e:
+            yield BlockRecord(tag, line, error=str(e) or e.__class__.__name__)
+
+def format_card(version, blocks_str):
+    """ Join already serialized blocks with the help card header / footer.
+    """
+    return HEADER + ' ' + version + '\n' + \
+           '\n'.join(blocks_str) + \
+           '\n' + FOOTER
+
+class HelpCard(object):
+    """ A whole help card: the version of help card maker which wrote it
+        and an ordered list of blocks.
+    """
+    def __init__(self, blocks=None, version=""):
+
+        self.blocks = list(blocks or [])
+        self.version = version
+        self.errors = []
+
+    def __iter__(self):
+
+        return iter(self.blocks)
+
+    def __len__(self):
+
+        return len(self.blocks)
+
+    def serialize(self, version=None):
+
+        if version is None:
+            version = self.version
+        return format_card(version, [b.serialize() for b in self.blocks])
+
+    def sections(self):
+        """ Set of the asset sections referenced by the card.
+        """
+        return set([s for b in self.blocks for s in b.sections()])
+
+    def validate(self):
+        """ Return a list of (block index, message) errors, block index is
+            None for errors about the card itself.
+        """
+        errors = []
+        titles = [i for i, b in enumerate(self.blocks) \
+                  if isinstance(b, MainTitleData)]
+        if len(titles) > 1:
+            errors.append((None, "Help card contains more than one main title"))
+
+        for i, b in enumerate(self.blocks):
+            errors += [(i, e) for e in b.validate()]
+
+        return errors
+
+    @classmethod
+    def parse(cls, text):
+        """ Parse a help card string generated by help card maker, the
+            clusters which can't be read are listed in card.errors as
+            (line number, message).
+        """
+        card = cls()
+        lines = iter_lines(text)
+        header = next(lines, "")
+        card.version = header[len(HEADER):].strip()
+
+        def _lines():
+            yield header
+            for l in lines:
+                yield l
+
+        for record in iter_blocks(_lines()):
+            if record.error:
+                card.errors.append((record.line, record.error))
+            else:
+                card.blocks.append(record.block)
+
+        return card
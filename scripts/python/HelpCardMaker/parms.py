@@ -0,0 +1,195 @@
+""" Headless parameters scan, used to build the parameters grid of a help
+    card from a parm template group without any node instance.
+"""
+from collections import OrderedDict
+
+from HelpCardMaker import model
+
+MULTIPARM_SUFFIX = " (multiparm)"
+
+def scan_parm_templates(parm_templates):
+    """ Walk the given parm templates ( e.g. parmTemplateGroup().entries() )
+        and return an ordered dict folder label => [[parm label, parm help]].
+        Parameters outside of any folder are stored under model.NO_FOLDER,
+        multiparm blocks get their own "label (multiparm)" entry listing all
+        their children. Hidden parameters and the ones without help are skipped.
+    """
+    import hou
+    folder_types = (hou.parmTemplateType.Folder,
+                    hou.parmTemplateType.FolderSet)
+    multiparm_types = (hou.folderType.MultiparmBlock,
+                       hou.folderType.ScrollingMultiparmBlock,
+                       hou.folderType.TabbedMultiparmBlock)
+
+    folders = OrderedDict()
+    folders[model.NO_FOLDER] = []
+    multiparms = OrderedDict()
+
+    stack = [(t, model.NO_FOLDER) for t in reversed(parm_templates)]
+    while stack:
+
+        t, container = stack.pop()
+
+        t_type = t.type()
+        if t_type == hou.parmTemplateType.Folder and \
+           t.folderType() in multiparm_types:
+            multiparms[t.label() + MULTIPARM_SUFFIX] = \
+                [[_t.label(), _t.help()] for _t in t.parmTemplates()]
+            continue
+
+        if t_type in folder_types:
+            folder = container
+            lbl = t.label()
+            if lbl:
+                folder = lbl
+                folders.setdefault(folder, [])
+            stack += [(_t, folder) for _t in reversed(t.parmTemplates())]
+            continue
+
+        help = t.help()
+        if not help or t.isHidden():
+            continue
+
+        folders.setdefault(container, []).append([t.label(), help])
+
+    folders.update(multiparms)
+    return folders
+
+def scan_definition(definition):
+    """ Scan the parameters of an asset definition.
+    """
+    return scan_parm_templates(definition.parmTemplateGroup().entries())
+
+def scan_node(node):
+    """ Scan the parameters of a node, including its spare parameters.
+    """
+    return scan_parm_templates(node.parmTemplateGroup().entries())
+
+ADDED = "added"
+REMOVED = "removed"
+RENAMED = "renamed"
+
+class SyncReport(object):
+    """ Parameters added, removed and renamed by merge_parms().
+    """
+    def __init__(self):
+
+        self.added = []
+        self.removed = []
+        self.renamed = []
+        self.kept = 0
+
+    def __bool__(self):
+
+        return bool(self.added or self.removed or self.renamed)
+
+    __nonzero__ = __bool__
+
+    def __str__(self):
+
+        if not self:
+            return "Parameters are up to date ({} kept)".format(self.kept)
+
+        out = ["{} kept, {} added, {} removed, {} renamed".format(
+               self.kept, len(self.added), len(self.removed), len(self.renamed))]
+        out += ["+ " + l for l in self.added]
+        out += ["- " + l for l in self.removed]
+        out += ["~ {} -> {}".format(o, n) for o, n in self.renamed]
+        return '\n'.join(out)
+
+def merge_parms(current, fresh, keep_removed=True):
+    """ Merge a fresh parameters scan into the current folders of a card.
+        The fresh scan gives the structure, the help of the parameters
+        already in the card is kept ( matched by folder and label, then by
+        label only for the parameters moved to another folder ).
+        In a folder with as many unmatched old and new parameters, they are
+        paired in order as renamed and keep their help.
+        Removed parameters stay at the end of their folder unless
+        keep_removed is False.
+        Return (merged folders, statuses, report), statuses maps
+        (folder, label) to ADDED / REMOVED / RENAMED, label is None for
+        the folder itself.
+    """
+    by_key = {}
+    by_label = {}
+    for folder, entries in current.items():
+        for label, help in entries:
+            key = (folder, label)
+            if key not in by_key:
+                by_key[key] = help
+                by_label.setdefault(label, []).append(key)
+
+    # exact (folder, label) matches first, so that a new parameter can't
+    # take the help of a parameter with the same label in another folder
+    matches = {}
+    used = set()
+    for folder, entries in fresh.items():
+        for i, (label, help) in enumerate(entries):
+            key = (folder, label)
+            if key in by_key and key not in used:
+                used.add(key)
+                matches[(folder, i)] = key
+
+    # then the parameters moved to another folder, matched by label
+    for folder, entries in fresh.items():
+        for i, (label, help) in enumerate(entries):
+            if (folder, i) in matches:
+                continue
+            for key in by_label.get(label, []):
+                if key not in used:
+                    used.add(key)
+                    matches[(folder, i)] = key
+                    break
+
+    merged = OrderedDict()
+    statuses = {}
+    report = SyncReport()
+
+    for folder, entries in fresh.items():
+
+        merged[folder] = []
+        if folder != model.NO_FOLDER and folder not in current:
+            statuses[(folder, None)] = ADDED
+
+        for i, (label, help) in enumerate(entries):
+
+            key = matches.get((folder, i))
+            if key is not None:
+                merged[folder].append([label, by_key[key]])
+                report.kept += 1
+            else:
+                merged[folder].append([label, help])
+                statuses[(folder, label)] = ADDED
+
+    # old parameters not found in the fresh scan
+    for folder, entries in current.items():
+
+        unmatched = [[l, h] for l, h in entries if (folder, l) not in used]
+        if not unmatched:
+            continue
+
+        added = [p for p in merged.get(folder, []) \
+                 if statuses.get((folder, p[0])) == ADDED]
+
+        if len(added) == len(unmatched):
+            for (old_label, old_help), p in zip(unmatched, added):
+                p[1] = old_help
+                statuses[(folder, p[0])] = RENAMED
+                report.renamed.append((old_label, p[0]))
+            continue
+
+        report.removed += [l for l, h in unmatched]
+        if not keep_removed:
+            continue
+
+        if folder not in merged:
+            merged[folder] = []
+            statuses[(folder, None)] = REMOVED
+        for l, h in unmatched:
+            merged[folder].append([l, h])
+            statuses[(folder, l)] = REMOVED
+
+    report.added = [l for (f, l), s in statuses.items() \
+                    if s == ADDED and l is not None]
+
+    return merged, statuses, report
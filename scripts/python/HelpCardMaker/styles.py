@@ -0,0 +1,140 @@
+""" Stylesheet shared by all the help widgets, compiled once and applied on
+    the MainPanel. Widgets are matched by object name and their variants
+    ( callout kind, title level, box color ) by dynamic properties.
+"""
+from PySide2 import QtWidgets
+
+from HelpCardMaker.utils import Colors, BoxColors, TitleType
+
+HOVER = "rgba(0,0,80,16)"
+
+# callout kind => (text and bar color, background color)
+CALLOUT_COLORS = {"TIP": (Colors.YELLOW, Colors.GREEN_LIGHT),
+                  "NOTE": (Colors.BLUE, Colors.PURPLE_LIGHT),
+                  "WARNING": (Colors.RED, Colors.RED_LIGHT)}
+
+def rgb(color):
+
+    return "rgb({},{},{})".format(color.red(), color.green(), color.blue())
+
+def box_colors():
+    """ BoxColors names, lower case as stored in the help card.
+    """
+    return sorted([k.lower() for k in dir(BoxColors) if not k.startswith('_')])
+
+BASE = """
+QToolBar#toolbar{border: 0px;
+                 background-color: None}
+QScrollArea#scroll{background-color: white;}
+QWidget#scrollWidget, QWidget#scrollWidget QWidget{background-color: white;}
+
+/* the background rules of the widgets in the scroll widget are prefixed
+   by it to be more specific than the white background above */
+QWidget#scrollWidget QToolButton#flatButton{background-color: transparent;
+                                            border: 0px}
+
+QWidget#scrollWidget QFrame#handle{background-color: #eaeaea;}
+QWidget#scrollWidget QFrame#handle:hover{background-color: #d5dae5;}
+
+QLabel#onThisPageEntry{color: #1782ba;}
+QLabel#onThisPageEntry:hover{color: #349ed5;}
+QLabel#onThisPageTitle{color: rgb(250, 150, 0);
+                       font-weight: bold}
+QWidget#scrollWidget QFrame#onThisPageFrame{background-color: #f3f3f3;
+                                            border-radius: 10px}
+
+QWidget#TextBlock QTextEdit, QWidget#TextBlock QLabel#textView,
+QWidget#BoxTitle QTextEdit, QWidget#BoxTitle QLabel#textView{background-color: transparent;
+                                                             border: 0px;
+                                                             color: black}
+QWidget#BoxTitle QTextEdit,
+QWidget#BoxTitle QLabel#textView{color: rgb(74, 160, 163)}
+QWidget#TextBlock QTextEdit:hover, QWidget#TextBlock QLabel#textView:hover,
+QWidget#BoxTitle QTextEdit:hover,
+QWidget#BoxTitle QLabel#textView:hover{background-color: %(hover)s}
+
+QWidget#MainTitle QLineEdit{background-color: transparent;
+                            border: 0px;
+                            color: black;
+                            font-size: 12pt;
+                            font-family: Arial;
+                            font-weight: bold}
+QWidget#MainTitle QLineEdit:hover{background-color: %(hover)s}
+QLabel#mainTitleContext{color: grey;
+                        font-size: 10pt;
+                        font-family: Arial}
+
+QWidget#Title QLineEdit{background-color: transparent;
+                        border: 0px;
+                        color: black;
+                        font-family: Arial;
+                        font-weight: bold}
+QWidget#Title[level="%(title)s"] QLineEdit{font-size: %(title)spt}
+QWidget#Title[level="%(entry)s"] QLineEdit{font-size: %(entry)spt;
+                                           color: rgb(0,0,105)}
+QWidget#Title QLineEdit:hover{background-color: %(hover)s}
+
+QWidget#scrollWidget QLabel#imageView{background-color: #f3f3f3;
+                                      color: grey}
+
+QLabel#calloutLabel{font-size: 11pt;
+                    font-weight: bold;}
+
+QLabel#parmsLabel{background-color: transparent;
+                  font-family: Source Sans Pro;
+                  color: black;
+                  font-size: 10pt}
+QWidget#scrollWidget QTableView#parmsView{background-color: transparent;
+                                          color: black;
+                                          font-family: Source Sans Pro;}
+
+QWidget#Separator QFrame#sep{background-color: transparent;
+                             color: black}
+QWidget#Separator QFrame#sep:hover{background-color: %(hover)s}
+
+QWidget#BoxText QTextEdit,
+QWidget#BoxText QLabel#textView{border: 1px solid black;
+                                border-radius: 8px;
+                                padding: 6px;
+                                color: black}
+"""
+
+CALLOUT = """
+QFrame#Callout[kind="%(kind)s"],
+QFrame#Callout[kind="%(kind)s"] QLabel{background-color: %(bg)s;}
+QFrame#Callout[kind="%(kind)s"] QLabel#calloutLabel{color: %(color)s;}
+QFrame#Callout[kind="%(kind)s"] QFrame#calloutBar{background-color: %(color)s;}
+"""
+
+BOX = """
+QWidget#BoxText[boxColor="%(name)s"] QTextEdit,
+QWidget#BoxText[boxColor="%(name)s"] QLabel#textView{background-color: %(color)s;}
+"""
+
+def build_stylesheet():
+
+    sheet = BASE % {"hover": HOVER,
+                    "title": TitleType.TITLE,
+                    "entry": TitleType.ENTRY_MENU}
+
+    for kind, (color, bg) in sorted(CALLOUT_COLORS.items()):
+        sheet += CALLOUT % {"kind": kind, "color": rgb(color), "bg": rgb(bg)}
+
+    for name in box_colors():
+        sheet += BOX % {"name": name,
+                        "color": rgb(getattr(BoxColors, name.upper()))}
+
+    return sheet
+
+STYLESHEET = build_stylesheet()
+
+def set_variant(widget, name, value):
+    """ Change a dynamic property used by the stylesheet and re-polish the
+        widget and its children, the stylesheet itself is not parsed again.
+    """
+    widget.setProperty(name, value)
+    style = widget.style()
+    for w in [widget] + widget.findChildren(QtWidgets.QWidget):
+        style.unpolish(w)
+        style.polish(w)
+    widget.update()
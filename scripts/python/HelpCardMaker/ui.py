@@ -3,8 +3,7 @@ VERSION = HelpCardMaker.__version__
 
 import hou
 import os
-import tempfile
-import uuid
+import time
 import traceback
 from collections import OrderedDict
 
@@ -12,31 +11,42 @@ from PySide2 import QtGui
 from PySide2 import QtCore
 from PySide2 import QtWidgets
 
-from HelpCardMaker import help_widgets
-reload(help_widgets)
-
+from HelpCardMaker import model
+from HelpCardMaker import assets
+from HelpCardMaker import images
+from HelpCardMaker import styles
+from HelpCardMaker import virtual
 from HelpCardMaker.utils import *
 from HelpCardMaker.help_widgets import *
 from HelpCardMaker.core import *
 
+# name given to the images pasted from the clipboard, the extension is
+# the one of the ingested data ( png or jpg ), it is used in the section name
+CLIPBOARD_IMAGE = "clipboard"
+
 class MainPanel(QtWidgets.QMainWindow):
     """ Main UI for pypanel creation
     """
     def __init__(self, parent=None):
         super(MainPanel, self).__init__(parent=parent)
         
+        icon_cache.preload()
+        images.clean_clipboard_files_once()
+
         cw = QtWidgets.QWidget()
 
         self.setProperty("houdiniStyle", True)
 
+        # one stylesheet for all the help widgets, see styles module
+        self.setStyleSheet(styles.STYLESHEET)
+
         self.main_layout = QtWidgets.QVBoxLayout()
         self.main_layout.setSpacing(5)
         
         # toolbar
         self.toolbar = QtWidgets.QToolBar(self)
         self.toolbar.setFloatable(True)
-        self.toolbar.setStyleSheet("""QToolBar{border: 0px;
-                                               background-color: None}""")
+        self.toolbar.setObjectName("toolbar")
 
         self.read_help_btn = QtWidgets.QToolButton()
         self.read_help_btn.setIcon(get_icon("open_card"))
@@ -133,11 +143,25 @@ class MainPanel(QtWidgets.QMainWindow):
         self.help_btn.clicked.connect(self.show_help)
         self.help_btn.setToolTip("Show Help")
         self.toolbar.addWidget(self.help_btn)
+
+        self.toolbar.addSeparator()
+
+        # size of the serialized help card, refreshed while editing
+        self.size_lbl = QtWidgets.QLabel("")
+        self.size_lbl.setToolTip("Size of the help card")
+        self.toolbar.addWidget(self.size_lbl)
+
+        self.size_timer = QtCore.QTimer(self)
+        self.size_timer.setSingleShot(True)
+        self.size_timer.setInterval(150)
+        self.size_timer.timeout.connect(self.update_size)
         
         self.addToolBar(self.toolbar)
 
+        # time spent creating the panel, set by main.init_panel()
+        self.startup_time = 0.0
+
         # scroll area
-        self.ui_widgets = []
         self.scroll_w = ScrollWidget(parent=self)
         self.scroll_w.setAutoFillBackground(True)
         self.scroll_lay = QtWidgets.QVBoxLayout()
@@ -145,12 +169,19 @@ class MainPanel(QtWidgets.QMainWindow):
         self.scroll_lay.setSpacing(5)
         self.scroll_lay.setAlignment(QtCore.Qt.AlignTop)
         self.scroll_w.setLayout(self.scroll_lay)
+        self.ui_widgets = BlockContainer(self.scroll_lay,
+                                         on_change=self.block_changed)
         self.scroll_area = QtWidgets.QScrollArea()
         self.scroll_area.setObjectName("scroll")
-        self.scroll_area.setStyleSheet("""QScrollArea{background-color: white;}""")
         self.scroll_area.setWidgetResizable(True)
         self.scroll_area.setWidget(self.scroll_w)
 
+        # long cards are loaded with placeholders, replaced by their widget
+        # when scrolled near the viewport.
+        self.virtualizer = virtual.Virtualizer(self.scroll_area,
+                                               self.ui_widgets,
+                                               self.create_widget)
+
         # on this page menu
         self.on_this_page = None
         self.n_titles = 0
@@ -174,44 +205,18 @@ class MainPanel(QtWidgets.QMainWindow):
             r = hou.ui.displayMessage("Clear all items ?", buttons=["Yes", "Cancel"])
             if r == 1: return
 
-        while len(self.ui_widgets) != 0:
-            for w in self.ui_widgets:
-                w.remove_me()
+        self.ui_widgets.clear()
 
     def remove_widget(self, w, delete=True):
         """ Remove a given widget from scroll area
         """
-        w.setParent(None)
-        self.scroll_lay.removeWidget(w)
-
-        if w in self.ui_widgets:
-            id = self.ui_widgets.index(w)
-            self.ui_widgets.pop(id)
-
-        if delete:
-            w.deleteLater()
-
-        for i, w in enumerate(self.ui_widgets):
-            w.idx = i
+        self.ui_widgets.remove(w, delete=delete)
 
     def move_widget(self, idx_from, idx_to):
         """ Move a widget using ids from / to.
             Used when widgets are reordered using drag and drops.
         """
-        
-
-        it = self.scroll_lay.itemAt(idx_from)
-        if not it: return
-        w = it.widget()
-        if not w: return
-
-        self.remove_widget(w, delete=False)
-        
-        self.scroll_lay.insertWidget(idx_to, w)
-        self.ui_widgets.insert(idx_to, w)
-
-        for i, w in enumerate(self.ui_widgets):
-            w.idx = i
+        self.ui_widgets.move(idx_from, idx_to)
 
     def insert_widget(self, w_type, idx):
         """ Insert a widget to the scroll area, w_type is a formated string
@@ -254,7 +259,9 @@ class MainPanel(QtWidgets.QMainWindow):
                 hou.ui.displayMessage("Nothing selected")
                 return
             main_title = [w for w in self.ui_widgets \
-                            if isinstance(w, MainTitle)]
+                            if isinstance(w, MainTitle) or \
+                            isinstance(getattr(w, "block", None),
+                                       model.MainTitleData)]
             if main_title:
                 hou.ui.displayMessage("Help card contains already a main title")
                 return
@@ -303,37 +310,55 @@ class MainPanel(QtWidgets.QMainWindow):
             w = Parameters(node=sel, parent=self)
 
         if w:
-            if idx == -1:
-                w.idx = len(self.ui_widgets) + 1
-                self.scroll_lay.addWidget(w)
-                self.ui_widgets.append(w)
-            else:
-                w.idx = idx
-                self.scroll_lay.insertWidget(idx, w)
-                self.ui_widgets.insert(idx, w)
-        
-        self.refresh_ids()
+            self.ui_widgets.insert(idx, w)
 
-    def refresh_ids(self):
+    def add_image_from_clip(self, image):
+        """ Add a clipboard QImage, it is encoded and optimized in memory on
+            the images worker thread pool then added at the end of the card.
+        """
+        images.worker().ingest(image, CLIPBOARD_IMAGE + ".png",
+                               self._add_clip_result)
 
-        for i, w in enumerate(self.ui_widgets):
-            w.idx = i
+    def _add_clip_result(self, result):
 
-    def add_image_from_clip(self, img_path):
-        
-        w = ImageFromDisk(img=img_path, parent=self)
+        name = CLIPBOARD_IMAGE + result.ext
+        print("Image {}: {}".format(name, result))
+        w = ImageFromDisk(img=name, img_data=result.data,
+                          optimize=False, report=result, parent=self)
+        self.ui_widgets.append(w)
 
-        idx = len(self.ui_widgets) + 1
-        self.scroll_lay.insertWidget(idx, w)
-        self.ui_widgets.insert(idx, w)
-        self.refresh_ids()
+    def get_help_str(self, node_type=None):
+        """ Fetch all the output help string from widgets, only the blocks
+            edited since the last call are serialized again.
+            node_type is the type of the asset the card is written to.
+        """
+        if node_type:
+            for w in self.ui_widgets:
+                if hasattr(w, "set_node_type"):
+                    w.set_node_type(node_type)
 
-    def get_help_str(self):
-        """ Fetch all the output help string from widgets
+        return model.format_card(VERSION,
+                                 [w.cached_output() for w in self.ui_widgets])
+
+    def block_changed(self, w=None):
+        """ Called when a block has been edited, added or removed.
         """
-        return "//HELP CARD MAKER " + VERSION + '\n' + \
-               '\n'.join([w.output() for w in self.ui_widgets]) + \
-               "\n//END"
+        if not self.size_timer.isActive():
+            self.size_timer.start()
+
+    def update_size(self):
+
+        self.size_lbl.setText(images.format_size(len(self.get_help_str())))
+        self.size_lbl.setToolTip("Size of the help card\nImage cache: " + \
+                                 images.cache.usage())
+
+    def validate(self):
+        """ Validate the current help card using the document model, return a
+            list of (widget, message).
+        """
+        card = model.HelpCard([w.data() for w in self.ui_widgets])
+        return [(self.ui_widgets[i] if i is not None else None, e) \
+                for i, e in card.validate()]
 
     def apply_help(self):
         """ Apply the sideFX help-wiki formatted strings to the section "Help" of
@@ -359,32 +384,69 @@ class MainPanel(QtWidgets.QMainWindow):
                                   severity=hou.severityType.ImportantMessage)
         if r == 1: return
 
+        errors = self.validate()
+        if errors:
+            r = hou.ui.displayMessage("Help card contains errors",
+                                      details='\n'.join([e for w, e in errors]),
+                                      buttons=["Apply anyway", "Cancel"],
+                                      severity=hou.severityType.Warning)
+            if r == 1: return
+
         definition = node.type().definition()
-        sections = definition.sections()
         if not definition:
             hou.ui.displayMessage("Selected node is not an digital asset")
             return
 
         node.allowEditingOfContents()
-        help = sections.get("Help", None)
-        if not help:
-            help = definition.addSection("Help", "")
-
-        help.setContents(self.get_help_str())
-
-        # clean unused help_card sections ( for old images )
-        current_imgs = [w.section_name for w in self.ui_widgets \
-                        if isinstance(w, ImageFromDisk)]
 
-        current_img_sections = [k for k in sections.keys() if \
-                                k.startswith("HELP_CARD_IMG_")]
+        # serializing has no side effect, all the sections ( help, icons,
+        # images ) are staged then written in one commit which is rolled
+        # back if a step fails.
+        start = time.time()
+        help_str = self.get_help_str(node.type().nameWithCategory())
+        serialize_time = time.time() - start
 
-        for s in current_img_sections:
-            if s not in current_imgs:
-                sections[s].destroy()
-
-        definition.save(definition.libraryFilePath())
-        hou.ui.displayMessage("Help card updated !")
+        writer = assets.SectionWriter(definition)
+        try:
+            start = time.time()
+            for w in self.ui_widgets:
+                w.write_sections(writer)
+            writer.stage("Help", help_str)
+            card = model.HelpCard([w.data() for w in self.ui_widgets])
+            referenced = card.sections()
+            collect_time = time.time() - start
+
+            # images and icons sections not referenced anymore are removed
+            saved = writer.commit(referenced,
+                                  [model.IMAGE_SECTION_PREFIX,
+                                   model.ICON_SECTION_PREFIX])
+        except Exception:
+            writer.rollback()
+            hou.ui.displayMessage("Help card could not be applied, the asset "
+                                  "was not modified",
+                                  details=traceback.format_exc(),
+                                  severity=hou.severityType.Error)
+            return
+        finally:
+            # the images may have been read from sections removed by the
+            # commit ( or added again by the rollback )
+            assets.store.rebind(writer.sections)
+
+        print("Help card applied: serialize {:.3f}s, collect {:.3f}s, ".format(
+              serialize_time, collect_time) + ", ".join(
+              ["{} {:.3f}s".format(k, v) for k, v in writer.timings.items()]))
+
+        reports = [w.ingest_report for w in self.ui_widgets \
+                   if isinstance(w, ImageFromDisk) and w.ingest_report]
+        if reports:
+            print("Help card images: {} optimized, {} saved".format(
+                  len(reports),
+                  images.format_size(sum([r.saved for r in reports]))))
+
+        if saved:
+            hou.ui.displayMessage("Help card updated !")
+        else:
+            hou.ui.displayMessage("Help card is already up to date")
         hou.ui.displayNodeHelp(node.type())
 
     def read_helpcard(self):
@@ -403,14 +465,16 @@ class MainPanel(QtWidgets.QMainWindow):
                                   severity=hou.severityType.Error)
             return
 
-        help = sel_def.sections().get("Help")
+        # fetched once, shared by all the blocks of the card
+        sections = sel_def.sections()
+        help = sections.get("Help")
         if not help:
             hou.ui.displayMessage("No help card found in this asset",
                                   severity=hou.severityType.Error)
             return
 
         help = help.contents()
-        if not help.startswith("//HELP CARD MAKER"):
+        if not help.startswith(model.HEADER):
             hou.ui.displayMessage("Can't read current asset's help card",
                                   help="Help card was not created by help card maker",
                                   severity=hou.severityType.Error)
@@ -423,160 +487,175 @@ class MainPanel(QtWidgets.QMainWindow):
 
         self.clean_widgets(show_popup=False)
 
-        self.widgets_infos = OrderedDict()
-        cur_cluster = True
-        help = [n for n in help.split('\n') if n not in ['\n', '']]
+        start = time.time()
+        records = list(model.iter_blocks(help))
+        parse_time = time.time() - start
+
+        n_blocks = len([r for r in records if not r.error])
+        use_placeholders = n_blocks > virtual.VIRTUAL_THRESHOLD
+
+        # widgets are built with the layout and the painting suspended,
+        # the text blocks are sized once everything is laid out.
+        errors = []
+        TextBlock.suspend_sizing = True
+        self.scroll_w.setUpdatesEnabled(False)
+        try:
+            start = time.time()
+            with self.ui_widgets.batch():
+                for record in records:
+
+                    if record.error:
+                        errors.append("line {} ({}): {}".format(record.line,
+                                                                record.tag,
+                                                                record.error))
+                        continue
+
+                    for e in record.block.validate():
+                        print("Reading Warning: line {}: {}".format(record.line, e))
+
+                    if use_placeholders:
+                        w = self.virtualizer.placeholder(record.block, sel,
+                                                         sections, parent=self)
+                    else:
+                        w = self.create_widget(record.block, sel, sections)
+                    if w:
+                        self.ui_widgets.append(w)
+
+                build_time = time.time() - start
+
+            # the layout is activated when leaving the batch
+            self.size_text_blocks()
+
+            # the blocks near the viewport are created and their images
+            # decoded once the widgets are shown and placed by the layout
+            self.virtualizer.schedule()
+        finally:
+            TextBlock.suspend_sizing = False
+            self.scroll_w.setUpdatesEnabled(True)
+        layout_time = time.time() - start - build_time
+
+        print("Help card loaded: {} block(s), parse {:.3f}s, widgets {:.3f}s, "
+              "layout {:.3f}s".format(len(self.ui_widgets), parse_time,
+                                      build_time, layout_time))
+        print(self.widget_stats())
+
+        if errors:
+            hou.ui.displayMessage("Some blocks of the help card could not be read",
+                                  details='\n'.join(errors),
+                                  severity=hou.severityType.Warning)
 
-        for i, data in enumerate(help):
+    def ensure_block_visible(self, w):
+        """ Scroll to the given block, created first if it is still a
+            placeholder. Return the block widget.
+        """
+        w = self.virtualizer.materialize(w)
+        if w is None:
+            return None
 
-            if i == 0: continue  # skip header
+        self.scroll_lay.activate()
+        self.scroll_area.ensureWidgetVisible(w)
+        return w
 
-            if data.startswith('//'):
-                cur_cluster = data.replace('//', '').replace('\n', '')
-                cur_cluster += '_' + str(i - 1)
-                self.widgets_infos[cur_cluster] = []
-                continue
-            
-            self.widgets_infos[cur_cluster].append(data)
+    def widget_stats(self):
+        """ Number of widgets and live text editors of the card and process
+            memory, used to compare the cost of the blocks.
+        """
+        n_widgets = len(self.scroll_w.findChildren(QtWidgets.QWidget))
+        n_editors = len(self.scroll_w.findChildren(QtWidgets.QTextEdit))
+        n_placeholders = len([w for w in self.ui_widgets \
+                              if isinstance(w, virtual.BlockPlaceholder)])
+
+        stats = "Help card widgets: {} widget(s), {} text editor(s), " \
+                "{} placeholder(s)".format(n_widgets, n_editors, n_placeholders)
+        stats += ", image cache " + images.cache.usage()
+        stats += ", " + icon_cache.stats()
+        stats += ", image data " + images.format_size(assets.store.memory())
+        memory = process_memory()
+        if memory is not None:
+            stats += ", process memory " + images.format_size(memory)
+        return stats
+
+    def size_text_blocks(self):
+        """ Fit the height of all the text blocks to their text in one pass,
+            the widgets are shown first to get their final width.
+        """
+        for w in self.ui_widgets:
+            w.show()
+        self.scroll_lay.activate()
+
+        for w in self.ui_widgets:
+            blocks = w.findChildren(TextBlock)
+            if isinstance(w, TextBlock):
+                blocks.append(w)
+            for b in blocks:
+                b.update_height()
+
+        self.scroll_lay.activate()
+
+    def create_widget(self, block, asset, sections=None):
+        """ Create the help widget matching the given model block, sections
+            are the asset sections, fetched from asset if None.
+            Images are decoded asynchronously.
+        """
+        if sections is None:
+            sections = asset.type().definition().sections()
 
-        for k in self.widgets_infos.keys():
-            self.apply_cluster(k, sel)
+        if isinstance(block, model.MainTitleData):
 
-    def apply_cluster(self, cluster, asset):
-        """ Apply a given "help cluster" and create a help widget accordingly
-            (help cluster is info about the widget, type and data).
-        """
-        w = None
-        data = self.widgets_infos[cluster]
-        idx = 0
-        cluster = cluster.split('_')[0]
-        if cluster == "MAINTITLE":
- 
-            text = data[0].replace("= ", '').replace(" =", '').replace('\n', '')
-            context = data[2].replace("#context: ", '').replace('\n', '')
-            icon = data[2].split('?')[-1].replace('\n', '')
-            icon_section = asset.type().definition().sections().get(icon)
+            icon_section = sections.get(block.icon_section)
             icon_data = None
             if icon_section:
                 icon_data = icon_section.contents()
-            w = MainTitle(text=text, context=context,
-                          icon=icon, icon_data=icon_data,
-                          asset=asset, parent=self)
-
-        elif cluster == "TEXTBLOCK":
-            text = '\n'.join(data)
-            w = TextBlock(text=text, parent=self)
-
-        elif cluster == "TIP":
-            text = "".join([ n[4:] for n in data if not n.startswith("    #")])
-            w = Tips(text=text, parent=self)
-
-        elif cluster == "WARNING":
-            text = "".join([ n[4:] for n in data[2:]])
-            w = Warning(text=text, parent=self)
-
-        elif cluster == "NOTE":
-            text = "".join([ n[4:] for n in data[2:]])
-            w = Note(text=text, parent=self)
-
-        elif cluster == "SEPARATOR":
-            w = Separator(parent=self)
-
-        elif cluster == "TITLEENTIRYMENU":
-            text = data[0].split(' ', 1)[-1]
-            w = Title(title_type=TitleType.ENTRY_MENU, text=text, parent=self)
-
-        elif cluster == "TITLE":
-            text = data[0].replace("== ", '').replace(" ==", '')
-            w = Title(title_type=TitleType.TITLE, text=text, parent=self)
-
-        elif cluster == "BULLETS":
-            
-            numbered = False
-            cleaned_data = []
-            for _d in data:
-                if _d.startswith("* "):
-                    cleaned_data.append(_d[2:])
-                elif _d.startswith("# "):
-                    cleaned_data.append(_d[2:])
-                    numbered = True
-                else:
-                    cleaned_data.append(_d)
-
-            text = "".join(cleaned_data)
-            w = Bullets(texts=cleaned_data, numbered=numbered, parent=self)
-
-        elif cluster == "TEXTBOX":
-            title = data[0].split(':box:')[-1]
-            if title == ":box:": title = ""
-            color_str = data[1].split(' ')[-1]
-            text = "".join([n[4:] for n in data[2:]])
-            w = TextBox(text=text, color_str=color_str, title=title,
-                        parent=self)
-
-        elif cluster == "VIMEO":
-            video_title = data[0].replace(":vimeo: ", '')
-            video_id = data[1].split(':')[-1]
-            w = Vimeo(title=video_title, video_id=video_id, parent=self)
-
-        elif cluster == "CODE:PYTHON" or cluster == "CODE:CPP":
-            
-            if len(data) < 4:
-                print("Helpcard Maker Error: invalid data for cluster CODE")
-                return
-
-            title = data[0].split(":box:")[-1]
-            if title == ":box:":
-                title = ""
-            else:
-                title = title.replace('\n', '')
-
-            text = data[3:-1]
-            if cluster == "CODE:PYTHON":
-                language = "python"
-            else:
-                language = "cpp"
-            
-            w = Code(text='\n'.join(text), language=language, title=title, parent=self)
-
-        elif cluster == "IMG":
-
-            img = data[0].split('?')[-1].replace(']', '')
-            img_data = asset.type().definition().sections().get(img)
-            if not img_data:
-                print("Reading Error: " + img + " data not found in asset sections.")
-                return
-            img_data = img_data.contents()
-            img = img.replace("HELP_CARD_IMG_", "")
-            w = ImageFromDisk(img=img, img_data=img_data, parent=self)
-
-        elif cluster == "PARAMETERS":
-
-            parms_dict = {"_NO_FOLDER_":[]}
-            cur_folder = "_NO_FOLDER_"
-
-            for i in range(len(data) - 1):
-
-                d = data[i]
-                next_d = data[i + 1]
-
-                if d == "@parameters": continue
-                if d.startswith("    "): continue
-
-                if d.endswith(':') and next_d.startswith("    "):
-                    parms_dict[cur_folder].append([d[:-1], next_d[4:]])
-                else:
-                    cur_folder = d
-                    if not cur_folder in parms_dict.keys():
-                        parms_dict[cur_folder] = []
-
-                w = Parameters(node=asset, parms_dict=parms_dict, parent=self)
-
-        if w:
-            w.idx = idx
-            self.scroll_lay.addWidget(w)
-            self.ui_widgets.append(w)
-            idx += 1
+            return MainTitle(text=block.text, context=block.context,
+                             icon=block.icon_section, icon_data=icon_data,
+                             asset=asset, parent=self)
+
+        if isinstance(block, model.TextBlockData):
+            return TextBlock(text=block.text, parent=self)
+
+        if isinstance(block, model.CalloutData):
+            cls = {"TIP":Tips, "NOTE":Note, "WARNING":Warning}[block.kind]
+            return cls(text=block.text, parent=self)
+
+        if isinstance(block, model.SeparatorData):
+            return Separator(parent=self)
+
+        if isinstance(block, model.TitleData):
+            title_type = TitleType.TITLE
+            if block.entry_menu:
+                title_type = TitleType.ENTRY_MENU
+            return Title(title_type=title_type, text=block.text, parent=self)
+
+        if isinstance(block, model.BulletsData):
+            return Bullets(texts=block.items, numbered=block.numbered,
+                           parent=self)
+
+        if isinstance(block, model.TextBoxData):
+            return TextBox(text=block.text, color_str=block.color,
+                           title=block.title, parent=self)
+
+        if isinstance(block, model.VimeoData):
+            return Vimeo(title=block.title, video_id=block.video_id,
+                         parent=self)
+
+        if isinstance(block, model.CodeData):
+            return Code(text=block.text, language=block.language,
+                        title=block.title, parent=self)
+
+        if isinstance(block, model.ImageData):
+            section = sections.get(block.section)
+            if not section:
+                print("Reading Error: " + block.section + \
+                      " data not found in asset sections.")
+                return None
+            img = block.section.replace(model.IMAGE_SECTION_PREFIX, "")
+            return ImageFromDisk(img=img, section=section,
+                                 decode_async=True, parent=self)
+
+        if isinstance(block, model.ParametersData):
+            return Parameters(node=asset, parms_dict=block.folders, parent=self)
+
+        return None
 
     def show_help(self):
         """ Show little help dialog box about how to use HelpCardMaker
@@ -1,16 +1,127 @@
 import hou
 from PySide2 import QtGui
 
+ICON_EXTENSIONS = [".png", ".svg"]
+
+# icons used by the panel toolbar and the most common widgets, fetched
+# once when the panel starts.
+PRELOAD_ICONS = ["open_card", "apply", "clean", "help", "header", "title1",
+                 "title2", "text_block", "view_gridline", "tips", "info",
+                 "warning", "box", "bullet", "numbering", "image", "sep",
+                 "vimeo", "code", "close", "color", "python", "s_dot"]
+
+class IconCache(object):
+    """ Process-wide cache of the icons created with hou.ui.createQtIcon,
+        keyed by icon name ( and size for pixmaps ). The extension which
+        resolved for a name is remembered so the failing lookups are only
+        done once.
+    """
+    def __init__(self):
+
+        self.icons = {}
+        self.pixmaps = {}
+        self.extensions = {}
+        self.hits = 0
+        self.misses = 0
+        self.pixmap_hits = 0
+        self.pixmap_misses = 0
+
+    def _create_icon(self, name):
+
+        exts = ICON_EXTENSIONS
+        if name in self.extensions:
+            exts = [self.extensions[name]]
+
+        for ext in exts:
+            try:
+                icon = hou.ui.createQtIcon("HelpcardMaker/" + name + ext)
+                self.extensions[name] = ext
+                return icon
+            except:
+                continue
+
+        print("Error: icon {} not found.".format(name))
+        return QtGui.QIcon("")
+
+    def _get_icon(self, name):
+
+        icon = self.icons.get(name)
+        if icon is None:
+            icon = self._create_icon(name)
+            self.icons[name] = icon
+        return icon
+
+    def icon(self, name):
+
+        if name in self.icons:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return self._get_icon(name)
+
+    def pixmap(self, name, w, h):
+        """ Pixmap lookups are counted apart from the icon ones, the icon
+            fetched on a pixmap miss is not counted.
+        """
+        key = (name, w, h)
+        pix = self.pixmaps.get(key)
+        if pix is not None:
+            self.pixmap_hits += 1
+            return pix
+
+        self.pixmap_misses += 1
+        pix = self._get_icon(name).pixmap(w, h)
+        self.pixmaps[key] = pix
+        return pix
+
+    def preload(self, names=PRELOAD_ICONS):
+
+        for n in names:
+            if n not in self.icons:
+                self.icon(n)
+
+    def clear(self):
+
+        self.icons.clear()
+        self.pixmaps.clear()
+        self.extensions.clear()
+        self.hits = 0
+        self.misses = 0
+        self.pixmap_hits = 0
+        self.pixmap_misses = 0
+
+    def stats(self):
+
+        def rate(hits, misses):
+            total = hits + misses
+            return 100.0 * hits / total if total else 0.0
+
+        return "icon cache: {} icons ({} hits, {} misses, {:.0f}%), " \
+               "{} pixmaps ({} hits, {} misses, {:.0f}%)".format(
+               len(self.icons), self.hits, self.misses,
+               rate(self.hits, self.misses),
+               len(self.pixmaps), self.pixmap_hits, self.pixmap_misses,
+               rate(self.pixmap_hits, self.pixmap_misses))
+
+icon_cache = IconCache()
+
 def get_icon(name):
-    
+
+    return icon_cache.icon(name)
+
+def get_pixmap(name, w, h):
+
+    return icon_cache.pixmap(name, w, h)
+
+def process_memory():
+    """ Resident memory of the process in bytes, None when psutil is not
+        installed.
+    """
     try:
-        return hou.ui.createQtIcon("HelpcardMaker/" + name + ".png")
-    except:
-        try:
-            return hou.ui.createQtIcon("HelpcardMaker/" + name + ".svg")
-        except:
-            print("Error: icon {} not found.".format(name))
-            return QtGui.QIcon("")
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
 
 class Colors(object):
 
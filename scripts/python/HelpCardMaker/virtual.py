@@ -0,0 +1,220 @@
+""" Viewport virtualization of long help cards. The blocks far from the
+    viewport are kept as BlockPlaceholder widgets holding their model block
+    and an estimated height, the real widgets are only created when the
+    placeholders come near the viewport. The sections of the asset the card
+    was read from are fetched once per load and shared by the placeholders.
+"""
+from PySide2 import QtCore
+from PySide2 import QtWidgets
+
+from HelpCardMaker import model
+from HelpCardMaker.core import WidgetInterface
+
+# cards with more blocks than this are loaded with placeholders
+VIRTUAL_THRESHOLD = 100
+
+# placeholders closer to the viewport than this number of viewport
+# heights are replaced by their widget
+MARGIN_SCREENS = 1.0
+
+def _text_lines(text, chars_per_line):
+
+    return sum([max(1, -(-len(l) // chars_per_line)) for l in text.split('\n')])
+
+def estimate_height(block, width, font_metrics):
+    """ Rough height in pixels of the widget of a model block for the
+        given available width.
+    """
+    lh = font_metrics.lineSpacing()
+    cpl = max(1, width // max(1, font_metrics.averageCharWidth()))
+
+    if isinstance(block, model.TextBlockData):
+        return _text_lines(block.text, cpl) * lh + 10
+
+    if isinstance(block, model.CalloutData):
+        return (_text_lines(block.text, cpl) + 1) * lh + 20
+
+    if isinstance(block, model.BulletsData):
+        return sum([_text_lines(t, cpl) * lh + 12 for t in block.items])
+
+    if isinstance(block, model.TextBoxData):
+        return (_text_lines(block.text, cpl) + 1) * lh + 32
+
+    if isinstance(block, model.CodeData):
+        return (block.text.count('\n') + 2) * lh + 20
+
+    if isinstance(block, model.ParametersData):
+        rows = sum([len(v) + 1 for v in block.folders.values()])
+        return rows * (lh + 8) + 30
+
+    if isinstance(block, model.ImageData):
+        return 200
+
+    if isinstance(block, model.MainTitleData):
+        return 45
+
+    if isinstance(block, model.VimeoData):
+        return 60
+
+    return 30
+
+class BlockPlaceholder(QtWidgets.QWidget, WidgetInterface):
+    """ Empty widget standing for a block not created yet, it takes part in
+        the drag and drop reordering and outputs its model block as is.
+        replacement is set to the real widget once created.
+    """
+    def __init__(self, block, asset=None, sections=None, height=30, idx=0,
+                 parent=None):
+        super(BlockPlaceholder, self).__init__(parent=parent)
+        WidgetInterface.__init__(self, idx, show_handle=False, parent=parent)
+
+        self.block = block
+        self.asset = asset
+        self.sections = sections
+        self.replacement = None
+        self.setFixedHeight(height)
+
+    def dropEvent(self, event):
+        return WidgetInterface.dropEvent(self, event)
+
+    def dragEnterEvent(self, event):
+        return WidgetInterface.dragEnterEvent(self, event)
+
+    def dragMoveEvent(self, event):
+        return WidgetInterface.dragMoveEvent(self, event)
+
+    def data(self):
+
+        return self.block
+
+    def set_node_type(self, node_type):
+
+        if isinstance(self.block, model.ImageData) and \
+           self.block.node_type != node_type:
+            self.block.node_type = node_type
+            self.invalidate_output()
+
+    def write_sections(self, writer):
+        """ The sections referenced by the block ( image, icon ) are copied
+            from the asset the card was read from when missing.
+        """
+        if self.asset is None:
+            return
+
+        src = self.sections
+        if src is None:
+            src = self.asset.type().definition().sections()
+        for name in self.block.sections():
+            if name not in writer.sections and name in src:
+                writer.stage(name, src[name].contents())
+
+    def output(self):
+
+        return self.block.serialize()
+
+class Virtualizer(object):
+    """ Replace the placeholders near the viewport of the scroll area by
+        their widget, created with factory(block, asset, sections). Updates are
+        coalesced to one per event loop tick.
+        The widgets having a set_in_view(bool) method ( images ) are told
+        whether they are near the viewport to release their pixmap.
+    """
+    def __init__(self, scroll_area, container, factory):
+
+        self.scroll_area = scroll_area
+        self.container = container
+        self.factory = factory
+
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.update)
+
+        bar = scroll_area.verticalScrollBar()
+        bar.valueChanged.connect(self.schedule)
+        bar.rangeChanged.connect(self.schedule)
+
+    def schedule(self, *args):
+
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def placeholder(self, block, asset=None, sections=None, parent=None):
+
+        width = self.scroll_area.viewport().width() - 60
+        height = estimate_height(block, max(100, width),
+                                 self.scroll_area.fontMetrics())
+        return BlockPlaceholder(block, asset=asset, sections=sections,
+                                height=height, parent=parent)
+
+    def _first_below(self, y):
+        """ Index of the first widget whose bottom is below y, widgets are
+            sorted by position so a binary search is enough.
+        """
+        widgets = self.container.widgets
+        lo, hi = 0, len(widgets)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if widgets[mid].geometry().bottom() < y:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def update(self):
+        """ Create the widgets of the placeholders near the viewport.
+        """
+        widgets = self.container.widgets
+        if not widgets:
+            return
+
+        top = self.scroll_area.verticalScrollBar().value()
+        h = self.scroll_area.viewport().height()
+        margin = int(h * MARGIN_SCREENS)
+
+        first = self._first_below(top - margin)
+        visible = []
+        near = set()
+        for w in widgets[first:]:
+            if w.geometry().top() > top + h + margin:
+                break
+            if isinstance(w, BlockPlaceholder):
+                visible.append(w)
+            near.add(w)
+
+        if visible:
+            with self.container.batch():
+                for w in visible:
+                    widget = self.materialize(w)
+                    if widget is not None:
+                        near.add(widget)
+
+        # after the materialization, the widgets created in this pass are
+        # told they are in view as well
+        for w in self.container.widgets:
+            if hasattr(w, "set_in_view"):
+                w.set_in_view(w in near)
+
+    def materialize(self, w):
+        """ Replace a placeholder by its widget, return the widget.
+        """
+        while isinstance(w, BlockPlaceholder) and w.replacement is not None:
+            w = w.replacement
+        if not isinstance(w, BlockPlaceholder) or w not in self.container:
+            return w
+
+        widget = self.factory(w.block, w.asset, w.sections)
+        if widget is None:
+            self.container.remove(w)
+            return None
+
+        w.replacement = widget
+        self.container.replace(w, widget)
+        return widget
+
+    def materialize_all(self):
+
+        with self.container.batch():
+            for w in self.container:
+                if isinstance(w, BlockPlaceholder):
+                    self.materialize(w)
@@ -0,0 +1,79 @@
+""" Minimal stub of the hou module used by the tests: asset definitions
+    holding their sections in memory.
+"""
+import types
+
+class ObjectWasDeleted(Exception):
+
+    pass
+
+class Section(object):
+
+    def __init__(self, definition, name, contents):
+
+        self.definition = definition
+        self._name = name
+        self._contents = contents
+        self.deleted = False
+
+    def name(self):
+
+        return self._name
+
+    def contents(self):
+
+        if self.deleted:
+            raise ObjectWasDeleted()
+        return self._contents
+
+    def setContents(self, contents):
+
+        self._contents = contents
+
+    def destroy(self):
+
+        self.deleted = True
+        self.definition._sections.pop(self._name, None)
+
+class Definition(object):
+
+    def __init__(self, name, help=""):
+
+        self.name = name
+        self.saves = 0
+        self.fail_save = False
+        self._sections = {}
+        self.addSection("Help", help)
+
+    def nodeTypeName(self):
+
+        return self.name
+
+    def sections(self):
+
+        return dict(self._sections)
+
+    def addSection(self, name, contents):
+
+        self._sections[name] = Section(self, name, contents)
+        return self._sections[name]
+
+    def libraryFilePath(self):
+
+        return self.name + ".hda"
+
+    def save(self, path):
+
+        if self.fail_save:
+            raise IOError("Can't save " + path)
+        self.saves += 1
+
+def stub_hou(libraries=None):
+
+    class hda(object):
+        definitionsInFile = staticmethod(lambda path: (libraries or {})[path])
+
+    hou = types.ModuleType("hou")
+    hou.hda = hda
+    hou.ObjectWasDeleted = ObjectWasDeleted
+    return hou
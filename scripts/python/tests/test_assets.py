@@ -0,0 +1,90 @@
+""" Section writes of the images of a card read from an older version,
+    with a stub hou module.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from HelpCardMaker import model
+from HelpCardMaker import assets
+
+from tests.hou_stub import Definition, stub_hou
+
+PREFIXES = [model.IMAGE_SECTION_PREFIX, model.ICON_SECTION_PREFIX]
+
+IMG_DATA = b"\x89PNG image data"
+
+def apply(definition, names, store):
+    """ Same steps as MainPanel.apply_help for the image blocks.
+    """
+    writer = assets.SectionWriter(definition)
+    try:
+        for name in names:
+            if name not in writer.sections:
+                writer.stage(name, store.data(name))
+        writer.stage("Help", "\n".join(names))
+        return writer.commit(names, PREFIXES)
+    finally:
+        store.rebind(writer.sections)
+
+class LegacyImages(unittest.TestCase):
+
+    def setUp(self):
+
+        self._hou = sys.modules.get("hou")
+        sys.modules["hou"] = stub_hou()
+
+        self.legacy = model.IMAGE_SECTION_PREFIX + "shot.png"
+        self.asset = Definition("sop_a")
+        section = self.asset.addSection(self.legacy, IMG_DATA)
+
+        # read from the card: stored under the content hashed name
+        self.name = model.IMAGE_SECTION_PREFIX + \
+                    assets.content_section_name(IMG_DATA, "shot.png")
+        self.store = assets.ImageStore()
+        self.store.add(self.name, None, section)
+
+    def tearDown(self):
+
+        if self._hou is None:
+            sys.modules.pop("hou", None)
+        else:
+            sys.modules["hou"] = self._hou
+
+    def test_apply_then_apply_again(self):
+
+        self.assertTrue(apply(self.asset, [self.name], self.store))
+        self.assertNotIn(self.legacy, self.asset.sections())
+        self.assertEqual(self.asset.sections()[self.name].contents(), IMG_DATA)
+
+        # the legacy section is gone, the data comes from the new one
+        self.assertEqual(self.store.data(self.name), IMG_DATA)
+
+        other = Definition("sop_b")
+        self.assertTrue(apply(other, [self.name], self.store))
+        self.assertEqual(other.sections()[self.name].contents(), IMG_DATA)
+
+        self.assertFalse(apply(self.asset, [self.name], self.store))
+
+    def test_failed_apply_is_rolled_back(self):
+
+        self.asset.fail_save = True
+        self.assertRaises(IOError, apply, self.asset, [self.name], self.store)
+
+        self.assertIn(self.legacy, self.asset.sections())
+        self.assertNotIn(self.name, self.asset.sections())
+        self.assertEqual(self.store.data(self.name), IMG_DATA)
+
+        self.asset.fail_save = False
+        self.assertTrue(apply(self.asset, [self.name], self.store))
+        self.assertEqual(self.store.data(self.name), IMG_DATA)
+
+    def test_deleted_section(self):
+
+        self.asset.sections()[self.legacy].destroy()
+        self.assertIsNone(self.store.data(self.name))
+
+if __name__ == "__main__":
+    unittest.main()
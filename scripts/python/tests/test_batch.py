@@ -0,0 +1,77 @@
+""" Batch refresh of the help cards of a library, with a stub hou module.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from HelpCardMaker import model
+from HelpCardMaker import batch
+
+from tests.hou_stub import Definition, stub_hou
+
+class NullStream(object):
+
+    def write(self, text):
+
+        return
+
+class BatchRefresh(unittest.TestCase):
+
+    def setUp(self):
+
+        self._hou = sys.modules.get("hou")
+
+    def tearDown(self):
+
+        if self._hou is None:
+            sys.modules.pop("hou", None)
+        else:
+            sys.modules["hou"] = self._hou
+
+    def run_batch(self, definitions):
+
+        sys.modules["hou"] = stub_hou({"lib.hda": definitions})
+        return batch.run(["lib.hda"], workers=1, stream=NullStream())
+
+    def test_refresh_is_stable(self):
+
+        folders = {model.NO_FOLDER: [["Scale", ""], ["Size", "s"]]}
+        blocks = [model.TitleData(text="Parameters"),
+                  model.ParametersData(folders=folders)]
+        help = model.HelpCard(blocks).serialize(batch.VERSION)
+        d = Definition("sop_test", help)
+
+        result, = self.run_batch([d])
+
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(result["updated"], 0)
+        self.assertEqual(d.saves, 0)
+        self.assertEqual(d.sections()["Help"].contents(), help)
+
+    def test_old_version_is_updated(self):
+
+        folders = {model.NO_FOLDER: [["Scale", ""]]}
+        help = model.HelpCard([model.ParametersData(folders=folders)]) \
+                    .serialize("0.0.0")
+        d = Definition("sop_test", help)
+
+        result, = self.run_batch([d])
+
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual(d.saves, 1)
+        block, = list(model.HelpCard.parse(d.sections()["Help"].contents()))
+        self.assertEqual(block.folders[model.NO_FOLDER], [["Scale", ""]])
+
+    def test_foreign_card_is_skipped(self):
+
+        d = Definition("sop_test", "= Hand written help =")
+
+        result, = self.run_batch([d])
+
+        self.assertEqual(result["skipped"], 1)
+        self.assertEqual(d.saves, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+""" Round-trip tests of the help card document model, no Qt nor hou needed.
+
+    python -m unittest discover -s tests ( from scripts/python )
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from HelpCardMaker import model
+
+def round_trip(blocks):
+
+    card = model.HelpCard(blocks)
+    return list(model.HelpCard.parse(card.serialize("0.0.0")))
+
+class ParametersRoundTrip(unittest.TestCase):
+
+    def test_empty_help(self):
+
+        folders = {model.NO_FOLDER: [["Scale", ""], ["Size", "s"]]}
+        block, = round_trip([model.ParametersData(folders=folders)])
+        self.assertEqual(list(block.folders.keys()), [model.NO_FOLDER])
+        self.assertEqual(block.folders[model.NO_FOLDER],
+                         [["Scale", ""], ["Size", "s"]])
+
+    def test_empty_help_last_in_folder(self):
+
+        folders = model.ParametersData(folders={}).folders
+        folders["Transform"] = [["Enable", ""]]
+        folders["Shape"] = [["Radius", "r"], ["Mode", ""]]
+        block, = round_trip([model.ParametersData(folders=folders)])
+        self.assertEqual(block.folders, folders)
+
+    def test_multiline_help(self):
+
+        folders = {model.NO_FOLDER: [["Scale", "first\n\nthird"]]}
+        block, = round_trip([model.ParametersData(folders=folders)])
+        self.assertEqual(block.folders[model.NO_FOLDER],
+                         [["Scale", "first\n\nthird"]])
+
+class TextBoxRoundTrip(unittest.TestCase):
+
+    def test_multiline_title(self):
+
+        box = model.TextBoxData(title="Box\ntitle", text="some text",
+                                color="red")
+        block, = round_trip([box])
+        self.assertEqual(block.title, "Boxtitle")
+        self.assertEqual(block.color, "red")
+        self.assertEqual(block.text, "some text")
+
+class ParseErrors(unittest.TestCase):
+
+    def setUp(self):
+
+        self.card = model.format_card("1.0", [
+                        model.TitleData(text="Intro").serialize(),
+                        "//IMG\nnot an image link",
+                        model.TextBlockData(text="hello").serialize(),
+                        "//UNKNOWN\nfoo"])
+
+    def test_error_records(self):
+
+        records = list(model.iter_blocks(self.card))
+
+        self.assertEqual([(r.tag, r.line) for r in records],
+                         [("TITLE", 2), ("IMG", 4), ("TEXTBLOCK", 6),
+                          ("UNKNOWN", 8)])
+        self.assertEqual([r.error is None for r in records],
+                         [True, False, True, False])
+        self.assertIsNone(records[1].block)
+        self.assertEqual(records[1].error, "Invalid image cluster")
+        self.assertEqual(records[2].block.text, "hello")
+
+    def test_card_errors(self):
+
+        card = model.HelpCard.parse(self.card)
+
+        self.assertEqual([type(b) for b in card],
+                         [model.TitleData, model.TextBlockData])
+        self.assertEqual([l for l, e in card.errors], [4, 8])
+
+    def test_not_a_card(self):
+
+        self.assertRaises(model.HelpCardError, list,
+                          model.iter_blocks("= Hand written help ="))
+
+if __name__ == "__main__":
+    unittest.main()
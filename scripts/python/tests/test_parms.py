@@ -0,0 +1,59 @@
+""" Merge of a fresh parameters scan into the parameters of a card.
+"""
+import os
+import sys
+import unittest
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from HelpCardMaker import model
+from HelpCardMaker import parms
+
+def folders(*items):
+
+    out = OrderedDict()
+    out[model.NO_FOLDER] = []
+    for folder, entries in items:
+        out[folder] = [list(e) for e in entries]
+    return out
+
+class MergeParms(unittest.TestCase):
+
+    def test_same_label_in_two_folders(self):
+
+        current = folders(("B", [["Enable", "edited B"]]))
+        fresh = folders(("A", [["Enable", "new A"]]),
+                        ("B", [["Enable", "default B"]]))
+
+        merged, statuses, report = parms.merge_parms(current, fresh)
+
+        self.assertEqual(merged["A"], [["Enable", "new A"]])
+        self.assertEqual(merged["B"], [["Enable", "edited B"]])
+        self.assertEqual(statuses.get(("A", "Enable")), parms.ADDED)
+        self.assertNotIn(("B", "Enable"), statuses)
+
+    def test_moved_parameter_keeps_its_help(self):
+
+        current = folders(("A", [["Scale", "edited"], ["Size", "s"]]))
+        fresh = folders(("A", [["Size", "default"]]),
+                        ("B", [["Scale", "default"]]))
+
+        merged, statuses, report = parms.merge_parms(current, fresh)
+
+        self.assertEqual(merged["B"], [["Scale", "edited"]])
+        self.assertEqual(merged["A"], [["Size", "s"]])
+        self.assertFalse(report)
+
+    def test_renamed_parameter_keeps_its_help(self):
+
+        current = folders(("A", [["Radius", "edited"]]))
+        fresh = folders(("A", [["Radius Scale", "default"]]))
+
+        merged, statuses, report = parms.merge_parms(current, fresh)
+
+        self.assertEqual(merged["A"], [["Radius Scale", "edited"]])
+        self.assertEqual(report.renamed, [("Radius", "Radius Scale")])
+
+if __name__ == "__main__":
+    unittest.main()